@@ -0,0 +1,134 @@
+import os
+from typing import Optional
+
+from pydantic import Field, model_validator
+from pydantic_settings import BaseSettings
+
+
+class Settings(BaseSettings):
+    """
+    All runtime knobs, read from the environment or .env. Field names map to the
+    upper-case environment variable of the same name (MONGODB_URL, ...).
+    """
+
+    # MongoDB
+    mongodb_url: str = "mongodb://localhost:27017"
+    database_name: str = "fastapi_crud"
+    mongo_app_name: str = "backend-st"
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 0
+    mongo_max_idle_time_ms: Optional[int] = None
+    mongo_max_connecting: int = 2
+    # Berapa lama request menunggu koneksi kosong sebelum gagal (None: tanpa batas)
+    mongo_wait_queue_timeout_ms: Optional[int] = 5000
+    mongo_server_selection_timeout_ms: int = 10000
+    mongo_connect_timeout_ms: int = 10000
+    mongo_socket_timeout_ms: Optional[int] = None
+    # Mis. "zstd,snappy,zlib"; zstd butuh paket zstandard, snappy butuh python-snappy
+    mongo_compressors: Optional[str] = None
+    mongo_read_preference: str = "primary"
+    mongo_read_concern_level: Optional[str] = None
+    # "majority" atau jumlah node, mis. "1"
+    mongo_write_concern_w: Optional[str] = None
+    mongo_journal: Optional[bool] = None
+    reconcile_indexes_on_startup: bool = True
+
+    # Cache. Tanpa cache_redis_url tiap worker punya cache lokal sendiri: invalidasi
+    # hanya berlaku di worker yang menulis, worker lain bisa menyajikan dokumen basi
+    # (mis. stock) paling lama cache_ttl_seconds. Dengan Redis, invalidasi disebar
+    # lewat pub/sub ke semua worker; basi hanya selama pesan belum sampai, atau
+    # paling lama cache_ttl_seconds kalau langganan pub/sub sedang terputus.
+    cache_ttl_seconds: float = 30
+    cache_max_entries: int = 10000
+    cache_redis_url: Optional[str] = None
+    principal_cache_max_ttl: float = 300
+    principal_cache_max_entries: int = 10000
+
+    # Password hashing
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = Field(default_factory=lambda: min(4, os.cpu_count() or 1))
+
+    # Activity log writer dan rollup
+    log_writer_batch_size: int = 500
+    log_writer_flush_interval_ms: float = 50
+    log_writer_queue_size: int = 10000
+    rollup_minute_retention_hours: int = 48
+    rollup_hour_retention_days: int = 90
+    rollup_compaction_delay_seconds: int = 300
+    rollup_compaction_interval_seconds: int = 300
+
+    # Retensi activity log: TTL di activity_logs, opt-in (None: simpan selamanya).
+    # Index TTL dibuat (atau di-collMod) oleh archiver, baru setelah arsip melewati
+    # batas retensi, jadi tidak ada log yang terhapus sebelum diarsip. Kembali ke None
+    # (ACTIVITY_LOG_RETENTION_DAYS=null) membuat archiver menghapus index TTL itu lagi.
+    activity_log_retention_days: Optional[int] = None
+    # Log lebih tua dari ini disalin ke collection arsip bulanan (None: tanpa arsip).
+    # Hanya berlaku bersama retensi (tanpa TTL arsip cuma menyimpan log dua kali) dan
+    # harus lebih kecil dari retensi supaya log sudah diarsip sebelum kena TTL.
+    activity_log_archive_after_days: Optional[int] = None
+    activity_log_archive_interval_seconds: int = 3600
+    # zstd butuh MongoDB >= 4.2; "snappy" adalah default WiredTiger
+    activity_log_archive_compressor: str = "zstd"
+
+    # Order: insert digabung per batch; jeda pendek karena checkout menunggu hasilnya
+    order_writer_batch_size: int = 200
+    order_writer_flush_interval_ms: float = 5
+
+    # Image variants
+    variant_cache_dir: str = "cache/variants"
+    variant_cache_max_mb: int = 512
+    image_variant_workers: int = 2
+
+    # Debug: profiler dan slow-query log. Tanpa debug_token endpoint /v1/debug mati
+    # dan profil hanya diambil lewat sampling.
+    debug_token: Optional[str] = None
+    profile_sample_rate: float = 0.0
+    profile_max_stored: int = 20
+    # None (SLOW_QUERY_MS=null) mematikan slow-query log
+    slow_query_ms: Optional[float] = 100
+    slow_query_max_entries: int = 500
+
+    class Config:
+        env_file = ".env"
+        extra = "ignore"
+        # Setting Optional bisa dimatikan lewat environment, mis. SLOW_QUERY_MS=null
+        env_parse_none_str = "null"
+
+    @model_validator(mode="after")
+    def check_activity_log_retention(self):
+        retention = self.activity_log_retention_days
+        archive_after = self.activity_log_archive_after_days
+        if retention is not None and archive_after is not None and archive_after >= retention:
+            raise ValueError(
+                "activity_log_archive_after_days must be smaller than activity_log_retention_days, "
+                "otherwise logs expire before they are archived"
+            )
+        return self
+
+    def mongo_client_options(self) -> dict:
+        """Keyword arguments for AsyncIOMotorClient; unset options keep the driver defaults."""
+        options = {
+            "appname": self.mongo_app_name,
+            "maxPoolSize": self.mongo_max_pool_size,
+            "minPoolSize": self.mongo_min_pool_size,
+            "maxConnecting": self.mongo_max_connecting,
+            "serverSelectionTimeoutMS": self.mongo_server_selection_timeout_ms,
+            "connectTimeoutMS": self.mongo_connect_timeout_ms,
+            "readPreference": self.mongo_read_preference,
+        }
+        optional = {
+            "maxIdleTimeMS": self.mongo_max_idle_time_ms,
+            "waitQueueTimeoutMS": self.mongo_wait_queue_timeout_ms,
+            "socketTimeoutMS": self.mongo_socket_timeout_ms,
+            "compressors": self.mongo_compressors,
+            "readConcernLevel": self.mongo_read_concern_level,
+            "journal": self.mongo_journal,
+        }
+        options.update({key: value for key, value in optional.items() if value is not None})
+        if self.mongo_write_concern_w is not None:
+            w = self.mongo_write_concern_w
+            options["w"] = int(w) if w.isdigit() else w
+        return options
+
+
+settings = Settings()
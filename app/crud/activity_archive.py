@@ -0,0 +1,174 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+from pymongo.errors import CollectionInvalid
+from app.config import settings
+from app.database import get_database
+from app.crud.activity_log import (
+    activity_logs_collection,
+    activity_log_archive_state_collection,
+    archive_collection_name,
+    get_archive_state,
+    ARCHIVE_STATE_ID,
+    LOG_INDEXES,
+    TTL_INDEX_NAME,
+)
+
+logger = logging.getLogger(__name__)
+
+db = get_database()
+
+ARCHIVE_AFTER = (
+    timedelta(days=settings.activity_log_archive_after_days)
+    if settings.activity_log_archive_after_days is not None else None
+)
+RETENTION = (
+    timedelta(days=settings.activity_log_retention_days)
+    if settings.activity_log_retention_days is not None else None
+)
+ARCHIVE_INTERVAL = settings.activity_log_archive_interval_seconds
+# Peringatan kalau watermark tertinggal sedekat ini dari batas TTL
+RETENTION_MARGIN = timedelta(days=1)
+
+def _month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def _next_month(value: datetime) -> datetime:
+    return (_month_start(value) + timedelta(days=32)).replace(day=1)
+
+async def _ensure_segment(segment: str):
+    """Create a month's archive collection with block compression and the same indexes as activity_logs."""
+    name = archive_collection_name(segment)
+    try:
+        await db.create_collection(name, storageEngine={
+            "wiredTiger": {"configString": f"block_compressor={settings.activity_log_archive_compressor}"}
+        })
+    except CollectionInvalid:
+        pass  # Sudah ada dari run sebelumnya
+    await db[name].create_indexes(LOG_INDEXES)
+
+async def archive_activity_logs(now: Optional[datetime] = None) -> int:
+    """
+    Copy logs older than the archive age into one compressed collection per
+    month, then move the watermark up to the new cutoff (start of a day). Logs
+    stay in activity_logs until the TTL removes them; readers switch to the
+    archive below the watermark. Copies use $merge with keepExisting, so a run
+    that was interrupted can simply be repeated. Returns the number of logs in
+    the newly archived range. Does nothing without a retention: with nothing
+    expiring, an archive would only store every log twice.
+    """
+    if ARCHIVE_AFTER is None or RETENTION is None:
+        return 0
+    now = now or datetime.utcnow()
+    cutoff = (now - ARCHIVE_AFTER).replace(hour=0, minute=0, second=0, microsecond=0)
+    state = await get_archive_state(refresh=True)
+    since = state["archived_until"] if state else None
+    if since is not None and since >= cutoff:
+        return 0
+
+    if since is None:
+        oldest = await activity_logs_collection.find_one(
+            {"created_at": {"$lt": cutoff}}, {"created_at": 1}, sort=[("created_at", 1)]
+        )
+        since = oldest["created_at"] if oldest else cutoff
+
+    archived = 0
+    segments: List[str] = []
+    month = _month_start(since)
+    while month < cutoff:
+        window = {"created_at": {"$gte": max(month, since), "$lt": min(_next_month(month), cutoff)}}
+        segment = month.strftime("%Y_%m")
+        await _ensure_segment(segment)
+        await activity_logs_collection.aggregate([
+            {"$match": window},
+            {"$merge": {
+                "into": archive_collection_name(segment),
+                "on": "_id",
+                "whenMatched": "keepExisting",
+                "whenNotMatched": "insert"
+            }}
+        ]).to_list(length=None)
+        archived += await activity_logs_collection.count_documents(window)
+        segments.append(segment)
+        month = _next_month(month)
+
+    # Segmen dan watermark diubah dalam satu update, jadi pembaca tidak pernah melihat salah satunya saja
+    await activity_log_archive_state_collection.update_one(
+        {"_id": ARCHIVE_STATE_ID},
+        {"$set": {"archived_until": cutoff}, "$addToSet": {"segments": {"$each": segments}}},
+        upsert=True
+    )
+    await get_archive_state(refresh=True)
+    return archived
+
+async def sync_ttl_index(now: Optional[datetime] = None) -> bool:
+    """
+    Bring the TTL index on activity_logs in line with the retention setting.
+    With archiving on, the index is only created once the archive watermark has
+    passed the retention horizon, so the TTL monitor never removes a log that was
+    not archived. Changed retention is applied with collMod; retention None drops
+    the index. Returns whether the TTL index is in place.
+    """
+    existing = (await activity_logs_collection.index_information()).get(TTL_INDEX_NAME)
+    if RETENTION is None:
+        if existing is not None:
+            await activity_logs_collection.drop_index(TTL_INDEX_NAME)
+            logger.info("Dropped %s; activity logs are kept forever", TTL_INDEX_NAME)
+        return False
+
+    if existing is None and ARCHIVE_AFTER is not None:
+        horizon = (now or datetime.utcnow()) - RETENTION
+        state = await get_archive_state(refresh=True)
+        if state is None or state["archived_until"] < horizon:
+            return False
+
+    expire_after = int(RETENTION.total_seconds())
+    if existing is None:
+        await activity_logs_collection.create_index(
+            "created_at", name=TTL_INDEX_NAME, expireAfterSeconds=expire_after
+        )
+        logger.info("Created %s (expire after %d days)", TTL_INDEX_NAME, RETENTION.days)
+    elif existing.get("expireAfterSeconds") != expire_after:
+        await db.command(
+            "collMod", activity_logs_collection.name,
+            index={"name": TTL_INDEX_NAME, "expireAfterSeconds": expire_after}
+        )
+        logger.info("Changed %s to expire after %d days", TTL_INDEX_NAME, RETENTION.days)
+    return True
+
+async def check_archive_lag(now: Optional[datetime] = None) -> bool:
+    """
+    Log an error and return False when the TTL is about to remove logs that are
+    not archived yet (the archiver fell behind after the TTL index was created).
+    """
+    if RETENTION is None or ARCHIVE_AFTER is None:
+        return True
+    horizon = (now or datetime.utcnow()) - RETENTION + RETENTION_MARGIN
+    state = await get_archive_state()
+    archived_until = state["archived_until"] if state else None
+    if archived_until is not None and archived_until >= horizon:
+        return True
+    window = {"$lt": horizon}
+    if archived_until is not None:
+        window["$gte"] = archived_until
+    if await activity_logs_collection.find_one({"created_at": window}, {"_id": 1}) is None:
+        return True
+    logger.error(
+        "Activity log archive is behind (archived until %s); the TTL will remove unarchived logs older than %s",
+        archived_until, horizon - RETENTION_MARGIN
+    )
+    return False
+
+async def run_activity_log_archiver():
+    """Background loop started from the app lifespan."""
+    while True:
+        try:
+            archived = await archive_activity_logs()
+            if archived:
+                logger.info("Archived %d activity logs", archived)
+            await sync_ttl_index()
+            await check_archive_lag()
+        except Exception:
+            logger.exception("Activity log archiving failed")
+        await asyncio.sleep(ARCHIVE_INTERVAL)
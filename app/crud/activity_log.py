@@ -1,19 +1,196 @@
+import time
+from collections import Counter
+from datetime import datetime
 from typing import List, Optional
 from bson import ObjectId
+from pymongo import UpdateOne, ReplaceOne, IndexModel
+from app.config import settings
 from app.database import get_database
 from app.models.activity_log import ActivityLog
 from app.schemas.activity_log import ActivityLogCreate
+from app.utils.cursor_utils import encode_cursor, decode_cursor, keyset_filter
+from app.utils.batch_writer import BatchWriter
+from app.utils.index_registry import index_registry
 
 db = get_database()
 activity_logs_collection = db["activity_logs"]
+# Counter per action, resource dan action x resource, di-$inc setiap batch log ditulis
+activity_counters_collection = db["activity_counters"]
+# Log lebih tua dari archived_until juga ada di collection arsip per bulan
+# (activity_logs_archive_YYYY_MM): {_id: "activity_logs", archived_until, segments: ["YYYY_MM", ...]}
+activity_log_archive_state_collection = db["activity_log_archive_state"]
+ARCHIVE_PREFIX = "activity_logs_archive_"
+ARCHIVE_STATE_ID = "activity_logs"
+# Watermark hanya maju dan log di sekitarnya masih ada di activity_logs sampai TTL,
+# jadi nilai yang sedikit basi tetap memberi hasil yang benar
+ARCHIVE_STATE_TTL = 60
+
+# Log ditulis per batch di background, dijalankan/dihentikan dari startup/shutdown app
+activity_log_writer = BatchWriter(
+    activity_logs_collection,
+    max_batch_size=settings.log_writer_batch_size,
+    flush_interval=settings.log_writer_flush_interval_ms / 1000,
+    max_queue_size=settings.log_writer_queue_size,
+)
+
+# Urutan (created_at, _id) bersifat total, jadi bisa dipakai sebagai keyset cursor
+LOG_SORT = [("created_at", -1), ("_id", -1)]
+
+# Dipakai juga untuk collection arsip, supaya query by user/resource sama cepatnya di sana
+LOG_INDEXES = [
+    IndexModel(LOG_SORT),
+    IndexModel([("user_id", 1)] + LOG_SORT),
+    IndexModel([("resource", 1), ("resource_id", 1)] + LOG_SORT),
+]
+
+index_registry.register(activity_logs_collection, *LOG_INDEXES)
+# Index TTL (satu field created_at) diurus archiver, lihat activity_archive.sync_ttl_index
+TTL_INDEX_NAME = "created_at_ttl"
+index_registry.register_external(activity_logs_collection, TTL_INDEX_NAME)
+index_registry.register(activity_counters_collection, IndexModel([("kind", 1), ("count", -1)]))
+index_registry.register_query("activity_logs.latest", activity_logs_collection, {}, LOG_SORT)
+index_registry.register_query(
+    "activity_logs.by_user", activity_logs_collection, {"user_id": {"$in": ["0" * 24, ObjectId("0" * 24)]}}, LOG_SORT
+)
+index_registry.register_query(
+    "activity_logs.by_resource", activity_logs_collection,
+    {"resource": "product", "resource_id": {"$in": ["0" * 24, ObjectId("0" * 24)]}}, LOG_SORT
+)
+index_registry.register_query(
+    "activity_logs.export_range", activity_logs_collection,
+    {"created_at": {"$gte": datetime(2024, 1, 1), "$lt": datetime(2024, 2, 1)}}, LOG_SORT
+)
+index_registry.register_query("activity_counters.top", activity_counters_collection, {"kind": "action"}, [("count", -1)])
+
+def _counter_docs(action: str, resource: str) -> List[dict]:
+    return [
+        {"_id": f"action:{action}", "kind": "action", "action": action},
+        {"_id": f"resource:{resource}", "kind": "resource", "resource": resource},
+        {"_id": f"action_resource:{action}:{resource}", "kind": "action_resource",
+         "action": action, "resource": resource},
+    ]
+
+async def increment_activity_counters(logs: List[dict]):
+    """Flush hook: add a batch of written logs to the counters in one bulk_write."""
+    totals = Counter((log["action"], log["resource"]) for log in logs)
+    increments = Counter()
+    keys = {}
+    for (action, resource), count in totals.items():
+        for doc in _counter_docs(action, resource):
+            increments[doc["_id"]] += count
+            keys[doc["_id"]] = doc
+    await activity_counters_collection.bulk_write([
+        UpdateOne(
+            {"_id": counter_id},
+            {"$inc": {"count": count}, "$setOnInsert": {k: v for k, v in keys[counter_id].items() if k != "_id"}},
+            upsert=True
+        )
+        for counter_id, count in increments.items()
+    ], ordered=False)
+
+activity_log_writer.add_flush_hook(increment_activity_counters)
+
+async def rebuild_activity_counters() -> int:
+    """
+    Recompute every counter from activity_logs (backfill / reconcile) and drop
+    counters that no longer have logs. Logs written while this runs may be
+    counted twice or missed, so run it when write traffic is quiet. Logs already
+    removed by the retention TTL are not counted.
+    """
+    pipeline = [{"$group": {"_id": {"action": "$action", "resource": "$resource"}, "count": {"$sum": 1}}}]
+    totals = Counter()
+    keys = {}
+    async for row in activity_logs_collection.aggregate(pipeline):
+        for doc in _counter_docs(row["_id"]["action"], row["_id"]["resource"]):
+            totals[doc["_id"]] += row["count"]
+            keys[doc["_id"]] = doc
+    if totals:
+        await activity_counters_collection.bulk_write([
+            ReplaceOne({"_id": counter_id}, {**keys[counter_id], "count": count}, upsert=True)
+            for counter_id, count in totals.items()
+        ], ordered=False)
+    await activity_counters_collection.delete_many({"_id": {"$nin": list(totals)}})
+    return len(totals)
+
+def archive_collection_name(segment: str) -> str:
+    """Archive collection of one month segment ("YYYY_MM")."""
+    return f"{ARCHIVE_PREFIX}{segment}"
+
+_archive_state = {"value": None, "expires": 0.0}
+
+async def get_archive_state(refresh: bool = False) -> Optional[dict]:
+    """The archive watermark and segments, cached for ARCHIVE_STATE_TTL seconds; None before the first archive run."""
+    now = time.monotonic()
+    if refresh or now >= _archive_state["expires"]:
+        _archive_state["value"] = await activity_log_archive_state_collection.find_one({"_id": ARCHIVE_STATE_ID})
+        _archive_state["expires"] = now + ARCHIVE_STATE_TTL
+    return _archive_state["value"]
+
+async def _find_page(collection, query: dict, skip: int, limit: int) -> List[dict]:
+    return await collection.find(query).sort(LOG_SORT).skip(skip).limit(limit).to_list(length=limit)
+
+async def _find_with_archive(query: dict, keyset: Optional[dict], after: Optional[datetime], skip: int, limit: int, state: dict) -> List[dict]:
+    """
+    One page over activity_logs (created_at >= watermark) followed by the archive
+    segments, newest month first. Sources entirely newer than the cursor are
+    skipped; skip is carried over into the next source when one runs out.
+    """
+    watermark = state["archived_until"]
+    sources = [(activity_logs_collection, {"created_at": {"$gte": watermark}}, watermark)]
+    for segment in sorted(state.get("segments", []), reverse=True):
+        segment_start = datetime.strptime(segment, "%Y_%m")
+        sources.append((db[archive_collection_name(segment)], {"created_at": {"$lt": watermark}}, segment_start))
+
+    logs = []
+    for collection, window, lower in sources:
+        if after is not None and lower > after:
+            continue
+        page_query = {"$and": [query, window] + ([keyset] if keyset else [])}
+        page = await _find_page(collection, page_query, skip, limit - len(logs))
+        logs.extend(page)
+        if len(logs) >= limit:
+            break
+        if skip:
+            skip = 0 if page else max(0, skip - await collection.count_documents(page_query))
+    return logs
+
+async def _find_logs(query: dict, skip: int, limit: int, cursor: Optional[str], raw: bool = False, archive: bool = False) -> list:
+    """archive=True continues into the archive collections when a page reaches past the watermark."""
+    keyset, after = None, None
+    if cursor:
+        values = decode_cursor(cursor, len(LOG_SORT))
+        keyset, after = keyset_filter(LOG_SORT, values), values[0]
+        skip = 0
+    state = await get_archive_state() if archive else None
+    if state:
+        logs = await _find_with_archive(query, keyset, after, skip, limit, state)
+    else:
+        logs = await _find_page(activity_logs_collection, {"$and": [query, keyset]} if keyset else query, skip, limit)
+    if raw:
+        return logs
+    return [ActivityLog(**log) for log in logs]
+
+def next_activity_log_cursor(logs: list, limit: int) -> Optional[str]:
+    """Cursor after the last log of a full page; accepts models or raw documents."""
+    if not logs or len(logs) < limit:
+        return None
+    last = logs[-1]
+    if isinstance(last, dict):
+        return encode_cursor(last["created_at"], str(last["_id"]))
+    return encode_cursor(last.created_at, str(last.id))
 
 async def create_activity_log(
     action: str,
     resource: str,
     resource_id: Optional[ObjectId] = None,
     user_id: Optional[ObjectId] = None,
-    details: Optional[dict] = None
+    details: Optional[dict] = None,
+    wait: bool = True
 ):
+    """
+    Write an activity log through the batch writer. wait=True returns once the
+    log is stored; wait=False only queues it (fire-and-forget).
+    """
     log_data = {
         "action": action,
         "resource": resource,
@@ -22,12 +199,33 @@ async def create_activity_log(
         "details": details
     }
     new_log = ActivityLog(**log_data)
-    result = await activity_logs_collection.insert_one(new_log.dict(by_alias=True))
-    return result.inserted_id
+    await activity_log_writer.write(new_log.dict(by_alias=True), wait=wait)
+    return new_log.id
 
-async def get_activity_logs(skip: int = 0, limit: int = 100) -> List[ActivityLog]:
-    logs = await activity_logs_collection.find().sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
-    return [ActivityLog(**log) for log in logs]
+async def create_activity_logs(entries: List[dict], wait: bool = True):
+    """Write many activity logs (dicts of create_activity_log arguments) in one batch."""
+    docs = [ActivityLog(**entry).dict(by_alias=True) for entry in entries]
+    await activity_log_writer.write_many(docs, wait=wait)
+
+async def get_activity_logs(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, raw: bool = False) -> list:
+    """raw=True returns the Mongo documents instead of ActivityLog models."""
+    return await _find_logs({}, skip, limit, cursor, raw)
+
+def iter_activity_logs(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    projection: Optional[dict] = None,
+    batch_size: int = 1000
+):
+    """Return an unmaterialized cursor over logs in [start, end), newest first."""
+    query = {}
+    if start or end:
+        query["created_at"] = {}
+        if start:
+            query["created_at"]["$gte"] = start
+        if end:
+            query["created_at"]["$lt"] = end
+    return activity_logs_collection.find(query, projection).sort(LOG_SORT).batch_size(batch_size)
 
 async def get_activity_log_by_id(log_id: str) -> Optional[ActivityLog]:
     if ObjectId.is_valid(log_id):
@@ -37,39 +235,25 @@ async def get_activity_log_by_id(log_id: str) -> Optional[ActivityLog]:
     return None
 
 async def get_top_activities(limit: int = 5) -> List[dict]:
-    pipeline = [
-        {
-            "$group": {
-                "_id": "$action",
-                "count": {"$sum": 1}
-            }
-        },
-        {"$sort": {"count": -1}},
-        {"$limit": limit},
-        {
-            "$project": {
-                "action": "$_id",
-                "count": 1,
-                "_id": 0
-            }
-        }
-    ]
-    
-    result = await activity_logs_collection.aggregate(pipeline).to_list(length=limit)
-    return result
+    # Dibaca dari activity_counters, bukan $group atas seluruh activity_logs
+    counters = activity_counters_collection.find(
+        {"kind": "action"},
+        {"_id": 0, "action": 1, "count": 1}
+    ).sort("count", -1).limit(limit)
+    return await counters.to_list(length=limit)
+
+def _id_values(value: str) -> dict:
+    # ActivityLog menyimpan id sebagai string; log lama bisa masih berisi ObjectId
+    return {"$in": [value, ObjectId(value)]}
 
-async def get_activity_logs_by_user(user_id: str, skip: int = 0, limit: int = 100) -> List[ActivityLog]:
+async def get_activity_logs_by_user(user_id: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, raw: bool = False) -> list:
+    """Logs of one user, newest first; older pages are read from the archive."""
     if ObjectId.is_valid(user_id):
-        logs = await activity_logs_collection.find(
-            {"user_id": ObjectId(user_id)}
-        ).sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
-        return [ActivityLog(**log) for log in logs]
+        return await _find_logs({"user_id": _id_values(user_id)}, skip, limit, cursor, raw, archive=True)
     return []
 
-async def get_activity_logs_by_resource(resource: str, resource_id: str, skip: int = 0, limit: int = 100) -> List[ActivityLog]:
+async def get_activity_logs_by_resource(resource: str, resource_id: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, raw: bool = False) -> list:
+    """Logs of one resource, newest first; older pages are read from the archive."""
     if ObjectId.is_valid(resource_id):
-        logs = await activity_logs_collection.find(
-            {"resource": resource, "resource_id": ObjectId(resource_id)}
-        ).sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
-        return [ActivityLog(**log) for log in logs]
+        return await _find_logs({"resource": resource, "resource_id": _id_values(resource_id)}, skip, limit, cursor, raw, archive=True)
     return []
\ No newline at end of file
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import List, Optional
+from pymongo import UpdateOne, IndexModel
+from app.config import settings
+from app.database import get_database
+from app.crud.activity_log import activity_logs_collection, activity_log_writer
+from app.utils.index_registry import index_registry
+
+logger = logging.getLogger(__name__)
+
+db = get_database()
+# Dokumen ringkasan per bucket waktu: {granularity, bucket, action, resource, count}
+activity_rollups_collection = db["activity_rollups"]
+# Watermark compaction per granularity: {_id: "hour" | "day", compacted_until}
+activity_rollup_state_collection = db["activity_rollup_state"]
+
+GRANULARITIES = ["minute", "hour", "day"]
+BUCKET_SIZES = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+# Berapa lama bucket halus disimpan setelah di-compact ke level di atasnya
+RETENTION = {
+    "minute": timedelta(hours=settings.rollup_minute_retention_hours),
+    "hour": timedelta(days=settings.rollup_hour_retention_days),
+}
+# Bucket yang baru lewat belum di-compact, memberi waktu untuk log yang datang terlambat
+COMPACTION_DELAY = timedelta(seconds=settings.rollup_compaction_delay_seconds)
+COMPACTION_INTERVAL = settings.rollup_compaction_interval_seconds
+MAX_STATS_BUCKETS = 10000
+
+index_registry.register(
+    activity_rollups_collection,
+    IndexModel([("granularity", 1), ("bucket", 1), ("action", 1), ("resource", 1)])
+)
+index_registry.register_query(
+    "activity_rollups.range", activity_rollups_collection,
+    {"granularity": "hour", "bucket": {"$gte": datetime(2024, 1, 1), "$lt": datetime(2024, 1, 2)}}
+)
+
+def floor_bucket(value: datetime, granularity: str) -> datetime:
+    value = value.replace(second=0, microsecond=0)
+    if granularity in ("hour", "day"):
+        value = value.replace(minute=0)
+    if granularity == "day":
+        value = value.replace(hour=0)
+    return value
+
+def _rollup_id(granularity: str, bucket: datetime, action: str, resource: str) -> str:
+    return f"{granularity}:{bucket.strftime('%Y-%m-%dT%H:%M:%S')}:{action}:{resource}"
+
+async def increment_activity_rollups(logs: List[dict]):
+    """Flush hook: add a batch of written logs to their minute buckets."""
+    totals = Counter(
+        (floor_bucket(log["created_at"], "minute"), log["action"], log["resource"]) for log in logs
+    )
+    await activity_rollups_collection.bulk_write([
+        UpdateOne(
+            {"_id": _rollup_id("minute", bucket, action, resource)},
+            {
+                "$inc": {"count": count},
+                "$setOnInsert": {"granularity": "minute", "bucket": bucket, "action": action, "resource": resource}
+            },
+            upsert=True
+        )
+        for (bucket, action, resource), count in totals.items()
+    ], ordered=False)
+
+activity_log_writer.add_flush_hook(increment_activity_rollups)
+
+async def _watermark(granularity: str) -> Optional[datetime]:
+    state = await activity_rollup_state_collection.find_one({"_id": granularity})
+    return state["compacted_until"] if state else None
+
+def _merge_pipeline(match: dict, date_field: str, count_expr, target: str) -> list:
+    """Group matching documents into `target` buckets and replace those rollup documents."""
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "bucket": {"$dateTrunc": {"date": date_field, "unit": target}},
+                "action": "$action",
+                "resource": "$resource"
+            },
+            "count": {"$sum": count_expr}
+        }},
+        {"$project": {
+            "_id": {"$concat": [
+                target, ":",
+                {"$dateToString": {"date": "$_id.bucket", "format": "%Y-%m-%dT%H:%M:%S"}}, ":",
+                "$_id.action", ":", "$_id.resource"
+            ]},
+            "granularity": target,
+            "bucket": "$_id.bucket",
+            "action": "$_id.action",
+            "resource": "$_id.resource",
+            "count": 1
+        }},
+        {"$merge": {
+            "into": activity_rollups_collection.name,
+            "on": "_id",
+            "whenMatched": "replace",
+            "whenNotMatched": "insert"
+        }}
+    ]
+
+async def compact_activity_rollups(now: Optional[datetime] = None):
+    """
+    Roll complete minute buckets up into hours and complete hours into days, then
+    drop fine buckets past their retention. Each target bucket is recomputed from
+    all of its source buckets and replaced, so running this twice (or from several
+    workers) gives the same result.
+    """
+    now = (now or datetime.utcnow()) - COMPACTION_DELAY
+    for source, target in (("minute", "hour"), ("hour", "day")):
+        cutoff = floor_bucket(now, target)
+        since = await _watermark(target)
+        if since is not None and since >= cutoff:
+            continue
+        match = {"granularity": source, "bucket": {"$lt": cutoff}}
+        if since is not None:
+            match["bucket"]["$gte"] = since
+        await activity_rollups_collection.aggregate(_merge_pipeline(match, "$bucket", "$count", target)).to_list(length=None)
+        await activity_rollup_state_collection.update_one(
+            {"_id": target}, {"$set": {"compacted_until": cutoff}}, upsert=True
+        )
+
+        # Bucket sumber hanya dihapus kalau sudah masuk ke level target
+        expire_before = min(cutoff, now - RETENTION[source])
+        await activity_rollups_collection.delete_many(
+            {"granularity": source, "bucket": {"$lt": expire_before}}
+        )
+
+async def rebuild_activity_rollups() -> None:
+    """
+    Recompute minute buckets from raw activity_logs (backfill), then compact again.
+    Like rebuild_activity_counters, run it when write traffic is quiet.
+    """
+    await activity_logs_collection.aggregate(
+        _merge_pipeline({}, "$created_at", 1, "minute")
+    ).to_list(length=None)
+    await activity_rollup_state_collection.delete_many({})
+    await compact_activity_rollups()
+
+async def run_rollup_compaction():
+    """Background loop started from the app startup hook."""
+    while True:
+        try:
+            await compact_activity_rollups()
+        except Exception:
+            logger.exception("Activity rollup compaction failed")
+        await asyncio.sleep(COMPACTION_INTERVAL)
+
+async def _load_buckets(granularity: str, start: datetime, end: datetime, query: dict) -> Counter:
+    counts = Counter()
+    compacted_until = start
+    if granularity != "minute":
+        watermark = await _watermark(granularity)
+        if watermark is not None:
+            compacted_until = max(start, min(end, watermark))
+    else:
+        compacted_until = end
+
+    if compacted_until > start:
+        docs = activity_rollups_collection.find(
+            {**query, "granularity": granularity, "bucket": {"$gte": start, "$lt": compacted_until}},
+            {"_id": 0, "bucket": 1, "action": 1, "resource": 1, "count": 1}
+        )
+        async for doc in docs:
+            counts[(doc["bucket"], doc["action"], doc["resource"])] += doc["count"]
+
+    # Rentang yang belum di-compact dijawab dari level yang lebih halus
+    if compacted_until < end:
+        finer = GRANULARITIES[GRANULARITIES.index(granularity) - 1]
+        for (bucket, action, resource), count in (await _load_buckets(finer, compacted_until, end, query)).items():
+            counts[(floor_bucket(bucket, granularity), action, resource)] += count
+    return counts
+
+async def get_activity_stats(
+    start: datetime,
+    end: datetime,
+    granularity: str = "hour",
+    action: Optional[str] = None,
+    resource: Optional[str] = None
+) -> List[dict]:
+    if granularity not in BUCKET_SIZES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    start = floor_bucket(start, granularity)
+    if end <= start:
+        raise ValueError("end must be after start")
+    if (end - start) / BUCKET_SIZES[granularity] > MAX_STATS_BUCKETS:
+        raise ValueError(f"Range too large for {granularity} granularity (max {MAX_STATS_BUCKETS} buckets)")
+
+    query = {}
+    if action:
+        query["action"] = action
+    if resource:
+        query["resource"] = resource
+    counts = await _load_buckets(granularity, start, end, query)
+    return [
+        {"bucket": bucket, "action": action, "resource": resource, "count": count}
+        for (bucket, action, resource), count in sorted(counts.items())
+    ]
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne, IndexModel
+from app.config import settings
+from app.database import get_database
+from app.models.order import Order, OrderItem
+from app.schemas.order import OrderItemCreate
+from app.crud.activity_log import create_activity_logs
+from app.crud.product import products_collection
+from app.utils.batch_writer import BatchWriter
+from app.utils.cache import cache
+from app.utils.index_registry import index_registry
+
+logger = logging.getLogger(__name__)
+
+db = get_database()
+orders_collection = db["orders"]
+
+ORDER_SORT = [("created_at", -1), ("_id", -1)]
+
+index_registry.register(orders_collection, IndexModel([("user_id", 1)] + ORDER_SORT))
+index_registry.register_query("orders.by_user", orders_collection, {"user_id": "0" * 24}, ORDER_SORT)
+
+# Saat flash sale banyak checkout datang bersamaan; insert order-nya digabung per batch
+order_writer = BatchWriter(
+    orders_collection,
+    max_batch_size=settings.order_writer_batch_size,
+    flush_interval=settings.order_writer_flush_interval_ms / 1000,
+    max_queue_size=settings.order_writer_batch_size * 50,
+)
+
+class ProductNotFound(Exception):
+    def __init__(self, product_id: str):
+        super().__init__(f"Product {product_id} not found")
+        self.product_id = product_id
+
+class InsufficientStock(Exception):
+    def __init__(self, product_id: str, requested: int, available: int):
+        super().__init__(f"Insufficient stock for product {product_id}: requested {requested}, available {available}")
+        self.product_id = product_id
+        self.requested = requested
+        self.available = available
+
+async def log_orders(orders: List[dict]):
+    """Flush hook: one activity log per stored order, queued as a single batch."""
+    await create_activity_logs([
+        {
+            "action": "create",
+            "resource": "order",
+            "resource_id": order["_id"],
+            "user_id": order["user_id"],
+            "details": {"items": len(order["items"]), "total_amount": order["total_amount"]}
+        }
+        for order in orders
+    ], wait=False)
+
+order_writer.add_flush_hook(log_orders)
+
+async def _reserve(product_id: str, quantity: int, now: datetime) -> Optional[dict]:
+    # Filter stock >= quantity dan $inc dalam satu perintah: atomik per dokumen, tidak bisa oversell
+    return await products_collection.find_one_and_update(
+        {"_id": product_id, "stock": {"$gte": quantity}},
+        {"$inc": {"stock": -quantity}, "$set": {"updated_at": now}},
+        projection={"price": 1},
+        return_document=ReturnDocument.AFTER
+    )
+
+async def _release(reserved: Dict[str, int]):
+    """Put back stock taken by a checkout that failed (compensation instead of a transaction)."""
+    if not reserved:
+        return
+    now = datetime.utcnow()
+    try:
+        await products_collection.bulk_write([
+            UpdateOne({"_id": product_id}, {"$inc": {"stock": quantity}, "$set": {"updated_at": now}})
+            for product_id, quantity in reserved.items()
+        ], ordered=False)
+    except Exception:
+        # Stok ini hilang sampai dikoreksi manual; catat semua yang perlu dikembalikan.
+        # Tidak di-raise, supaya error asli checkout yang sampai ke pemanggil.
+        logger.exception("Could not release reserved stock: %s", reserved)
+
+async def _invalidate_products(product_ids):
+    # Stok berubah (atau dikembalikan), jadi produk yang di-cache sudah basi
+    if product_ids:
+        await cache.invalidate_many([f"product:{product_id}" for product_id in product_ids])
+
+async def _store(order_doc: dict, reserved: Dict[str, int]):
+    """Queue the order on the batch writer and wait for it; stock is released only if the insert fails."""
+    try:
+        await order_writer.write(order_doc, wait=True)
+    except Exception:
+        await _release(reserved)
+        raise
+    finally:
+        await _invalidate_products(reserved)
+
+async def place_order(user_id: str, items: List[OrderItemCreate]) -> Order:
+    """
+    Reserve stock for every item with a conditional $inc, then store the order.
+    If any item cannot be reserved, or the order cannot be stored, stock already
+    taken is released again. Raises ValueError on an invalid product id,
+    ProductNotFound and InsufficientStock.
+    """
+    # Produk yang sama di beberapa baris digabung, supaya hanya satu $inc per produk
+    quantities: Dict[str, int] = {}
+    for item in items:
+        if not ObjectId.is_valid(item.product_id):
+            raise ValueError(f"Invalid product id: {item.product_id}")
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+
+    now = datetime.utcnow()
+    product_ids = list(quantities)
+    results = await asyncio.gather(
+        *[_reserve(product_id, quantities[product_id], now) for product_id in product_ids],
+        return_exceptions=True
+    )
+    reserved = {
+        product_id: quantities[product_id]
+        for product_id, result in zip(product_ids, results)
+        if isinstance(result, dict)
+    }
+    try:
+        for product_id, result in zip(product_ids, results):
+            if isinstance(result, BaseException):
+                raise result
+            if result is None:
+                product = await products_collection.find_one({"_id": product_id}, {"stock": 1})
+                if product is None:
+                    raise ProductNotFound(product_id)
+                raise InsufficientStock(product_id, quantities[product_id], product["stock"])
+
+        prices = {product_id: result["price"] for product_id, result in zip(product_ids, results)}
+        order = Order(
+            user_id=user_id,
+            items=[
+                OrderItem(product_id=product_id, quantity=quantity, price=prices[product_id])
+                for product_id, quantity in quantities.items()
+            ],
+            total_amount=round(sum(prices[product_id] * quantity for product_id, quantity in quantities.items()), 2),
+            status="completed",
+            created_at=now,
+            updated_at=now
+        )
+    except BaseException:
+        # Order belum masuk antrean (juga kalau request dibatalkan), jadi stoknya dikembalikan
+        await _release(reserved)
+        await _invalidate_products(reserved)
+        raise
+
+    # Begitu masuk antrean BatchWriter, order tetap disimpan walau request-nya dibatalkan
+    # (client putus, timeout); shield supaya stok hanya dikembalikan kalau insert gagal
+    await asyncio.shield(_store(order.dict(by_alias=True), reserved))
+    return order
+
+async def get_order(order_id: str) -> Optional[Order]:
+    if ObjectId.is_valid(order_id):
+        doc = await orders_collection.find_one({"_id": order_id})
+        if doc:
+            return Order(**doc)
+    return None
+
+async def get_orders_by_user(user_id: str, skip: int = 0, limit: int = 100) -> List[Order]:
+    docs = await orders_collection.find({"user_id": user_id}).sort(ORDER_SORT).skip(skip).limit(limit).to_list(length=limit)
+    return [Order(**doc) for doc in docs]
@@ -1,48 +1,215 @@
-from typing import List, Optional
+import itertools
+import logging
+import re
+from typing import List, Optional, Tuple
 from bson import ObjectId
+from pymongo import ReturnDocument, InsertOne, UpdateOne, DeleteOne, IndexModel
+from pymongo.errors import BulkWriteError
 from app.database import get_database
 from app.models.product import Product
-from app.schemas.product import ProductCreate, ProductUpdate
-from app.crud.activity_log import create_activity_log
+from app.schemas.product import ProductCreate, ProductUpdate, ProductBulkUpdateItem
+from app.crud.activity_log import create_activity_log, create_activity_logs
+from app.utils.cache import cache
+from app.utils.search_utils import search_terms, tokenize, query_prefixes, MAX_QUERY_TERMS
+from app.utils.cursor_utils import encode_cursor, decode_cursor, keyset_filter
+from app.utils.index_registry import index_registry
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 db = get_database()
 products_collection = db["products"]
 
-async def create_category_index():
-    await products_collection.create_index("category")
+# Jumlah operasi per perintah bulk_write
+BULK_CHUNK_SIZE = 1000
+
+# Field pencarian tidak pernah dikirim ke client, jadi tidak ikut dibaca
+PRODUCT_PROJECTION = {"name_terms": 0, "search_terms": 0}
+# Batas bawah tiap price band untuk facet pencarian; band terakhir tanpa batas atas
+PRICE_BANDS = [0, 10, 50, 100, 500, 1000, 5000]
+# Kandidat teratas (menurut skor) yang dihitung facet-nya dan bisa dipaginasi per pencarian
+SEARCH_MAX_CANDIDATES = 5000
+# Kunci urutan listing; _id ditambahkan sebagai tie-breaker supaya bisa dipakai keyset cursor
+LISTING_SORT_KEYS = ["price", "created_at", "stock"]
+
+# Per kunci urutan listing: (key, _id) dan (category, key, _id). Equality category
+# di depan lalu kunci urutan, jadi sort tidak perlu tahap SORT di memori; filter
+# status, rentang harga dan in_stock diterapkan sambil menelusuri index. Setiap
+# index melayani dua arah urutan. Index tunggal "category" lama sudah tercakup
+# sebagai prefix dan tidak dideklarasikan lagi.
+index_registry.register(
+    products_collection,
+    *[IndexModel([(key, 1), ("_id", 1)]) for key in LISTING_SORT_KEYS],
+    *[IndexModel([("category", 1), (key, 1), ("_id", 1)]) for key in LISTING_SORT_KEYS],
+    # Multikey index; regex prefix (^term) pada array ini menjadi range scan
+    IndexModel("search_terms"),
+)
 
 async def create_product(product: ProductCreate) -> Product:
     product_dict = product.dict()
     new_product = Product(**product_dict)
-    result = await products_collection.insert_one(new_product.dict(by_alias=True))
+    product_doc = new_product.dict(by_alias=True)
+    product_doc.update(search_terms(product_doc["name"], product_doc["description"]))
+    # Dokumen yang di-insert sudah lengkap, tidak perlu dibaca ulang
+    await products_collection.insert_one(product_doc)
     
     # Log activity
     await create_activity_log(
         action="create",
         resource="product",
-        resource_id=result.inserted_id,
-        user_id=result.inserted_id,  
-        details={"name": product.name}
+        resource_id=product_doc["_id"],
+        user_id=product_doc["_id"],  
+        details={"name": product.name},
+        wait=False
     )
     
-    created_product = await products_collection.find_one({"_id": result.inserted_id})
-    return Product(**created_product)
+    return Product(**product_doc)
 
-async def get_products(skip: int = 0, limit: int = 100, category: Optional[str] = None) -> List[Product]:
+async def get_product_docs(
+    skip: int = 0,
+    limit: int = 100,
+    category: Optional[str] = None,
+    projection: Optional[dict] = None
+) -> List[dict]:
+    """A page of products as raw documents, search fields left out unless a projection is given."""
     query = {}
     if category:
         query["category"] = category
     
-    products = await products_collection.find(query).skip(skip).limit(limit).to_list(length=limit)
+    return await products_collection.find(query, projection or PRODUCT_PROJECTION).skip(skip).limit(limit).to_list(length=limit)
+
+async def get_products(skip: int = 0, limit: int = 100, category: Optional[str] = None) -> List[Product]:
+    products = await get_product_docs(skip, limit, category)
     return [Product(**product) for product in products]
 
-async def get_product(product_id: str) -> Optional[Product]:
+def product_listing_query(
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: Optional[bool] = None,
+    sort: str = "created_at",
+    order: str = "desc"
+) -> Tuple[dict, List[Tuple[str, int]]]:
+    """Build the (filter, sort) for a product listing. Raises ValueError on a bad sort."""
+    if sort not in LISTING_SORT_KEYS:
+        raise ValueError(f"sort must be one of {', '.join(LISTING_SORT_KEYS)}")
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be asc or desc")
+    direction = 1 if order == "asc" else -1
+
+    query = {}
+    if category:
+        query["category"] = category
+    if status:
+        query["status"] = status
+    if min_price is not None or max_price is not None:
+        query["price"] = {}
+        if min_price is not None:
+            query["price"]["$gte"] = min_price
+        if max_price is not None:
+            query["price"]["$lte"] = max_price
+    if in_stock is True:
+        query["stock"] = {"$gt": 0}
+    elif in_stock is False:
+        query["stock"] = {"$lte": 0}
+    return query, [(sort, direction), ("_id", direction)]
+
+def _register_listing_queries():
+    combinations = itertools.product(
+        (None, "electronics"),          # category
+        (None, "active"),               # status
+        (None, (10, 100)),              # price range
+        (None, True),                   # in_stock
+        LISTING_SORT_KEYS,
+        ("asc", "desc"),
+    )
+    for category, status, price_range, in_stock, sort, order in combinations:
+        min_price, max_price = price_range or (None, None)
+        query, sort_spec = product_listing_query(category, status, min_price, max_price, in_stock, sort, order)
+        index_registry.register_query(f"products.listing {query} {sort}:{order}", products_collection, query, sort_spec)
+
+_register_listing_queries()
+index_registry.register_query(
+    "products.search", products_collection, {"search_terms": {"$in": [re.compile("^lapt"), re.compile("^lap")]}}
+)
+
+async def get_product_listing(
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: Optional[bool] = None,
+    sort: str = "created_at",
+    order: str = "desc",
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    projection: Optional[dict] = None
+) -> List[dict]:
+    """
+    Filtered, sorted raw product documents. With a cursor (from
+    next_product_cursor) skip is ignored and the page starts after the cursor.
+    Raises ValueError on a bad sort or cursor.
+    """
+    query, sort_spec = product_listing_query(category, status, min_price, max_price, in_stock, sort, order)
+    if cursor:
+        tag, value, last_id = decode_cursor(cursor, 3)
+        if tag != f"{sort}:{order}":
+            raise ValueError("Cursor does not match sort and order")
+        query = {"$and": [query, keyset_filter(sort_spec, [value, last_id])]}
+        skip = 0
+    if projection:
+        # Nilai kunci urutan dibutuhkan untuk membuat cursor berikutnya
+        projection = {**projection, sort: 1}
+    return await products_collection.find(query, projection or PRODUCT_PROJECTION).sort(sort_spec).skip(skip).limit(limit).to_list(length=limit)
+
+def next_product_cursor(docs: List[dict], sort: str, order: str, limit: int) -> Optional[str]:
+    if not docs or len(docs) < limit:
+        return None
+    last = docs[-1]
+    return encode_cursor(f"{sort}:{order}", last.get(sort), last["_id"])
+
+def iter_products(
+    category: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    projection: Optional[dict] = None,
+    batch_size: int = 1000
+):
+    """Return an unmaterialized cursor over products created in [start, end)."""
+    query = {}
+    if category:
+        query["category"] = category
+    if start or end:
+        query["created_at"] = {}
+        if start:
+            query["created_at"]["$gte"] = start
+        if end:
+            query["created_at"]["$lt"] = end
+    return products_collection.find(query, projection or PRODUCT_PROJECTION).sort("_id", 1).batch_size(batch_size)
+
+async def get_product_doc(product_id: str, projection: Optional[dict] = None) -> Optional[dict]:
+    """
+    One product through the read-through cache; the dict is shared with other
+    requests, so copy before changing it. With a projection the cached product
+    is reused if present, otherwise only those fields are read and nothing is
+    cached.
+    """
     if ObjectId.is_valid(product_id):
-        product = await products_collection.find_one({"_id": product_id})
-        print(f"{product=}")
-        if product:
-            return Product(**product)
+        key = f"product:{product_id}"
+        if projection is not None:
+            return cache.peek(key) or await products_collection.find_one({"_id": product_id}, projection)
+        return await cache.get_or_load(
+            key,
+            lambda: products_collection.find_one({"_id": product_id}, PRODUCT_PROJECTION)
+        )
+    return None
+
+async def get_product(product_id: str) -> Optional[Product]:
+    product = await get_product_doc(product_id)
+    if product:
+        return Product(**product)
     return None
 
 
@@ -51,49 +218,306 @@ async def update_product(product_id: str, product: ProductUpdate) -> Optional[Pr
         if update_data:
             update_data["updated_at"] = datetime.utcnow()  
             
-            result = await products_collection.update_one(
-                {"_id":product_id}, 
-                {"$set": update_data}
+            updated_product = await products_collection.find_one_and_update(
+                {"_id": product_id}, 
+                {"$set": update_data},
+                return_document=ReturnDocument.AFTER
             )
             
-            if result.modified_count == 1:
-        
+            if updated_product:
+                if "name" in update_data or "description" in update_data:
+                    await _refresh_search_terms([updated_product])
+                await cache.invalidate(f"product:{product_id}")
                 await create_activity_log(
                     action="update",
                     resource="product",
                     resource_id=product_id,
                     user_id=product_id,  
-                    details=update_data
+                    details=update_data,
+                    wait=False
                 )
                 
-                updated_product = await products_collection.find_one({"_id": product_id})
                 return Product(**updated_product)
         return None
 
 
 async def delete_product(product_id: str) -> bool:
     if ObjectId.is_valid(product_id):
-        product = await products_collection.find_one({"_id": product_id})
-        
-        result = await products_collection.delete_one({"_id": product_id})
-        if result.deleted_count == 1:
+        product = await products_collection.find_one_and_delete(
+            {"_id": product_id},
+            projection={"name": 1}
+        )
+        if product:
+            await cache.invalidate(f"product:{product_id}")
             await create_activity_log(
                 action="delete",
                 resource="product",
                 resource_id=product_id,
                 user_id=product_id, 
-                details={"name": product["name"]} if product else {}
+                details={"name": product["name"]},
+                wait=False
             )
             return True
     return False
 
+async def get_top_product_docs(by: str = "price", limit: int = 5, projection: Optional[dict] = None) -> List[dict]:
+    sort_field = by if by in LISTING_SORT_KEYS else "price"
+    # _id ikut diurutkan supaya index (sort_field, _id) yang dipakai
+    return await products_collection.find({}, projection or PRODUCT_PROJECTION).sort(
+        [(sort_field, -1), ("_id", -1)]
+    ).limit(limit).to_list(length=limit)
+
 async def get_top_products(by: str = "price", limit: int = 5) -> List[Product]:
-    if by == "price":
-        sort_field = "price"
-    elif by == "created_at":
-        sort_field = "created_at"
-    else:
-        sort_field = "price"  
-    
-    products = await products_collection.find().sort(sort_field, -1).limit(limit).to_list(length=limit)
-    return [Product(**product) for product in products]
\ No newline at end of file
+    products = await get_top_product_docs(by, limit)
+    return [Product(**product) for product in products]
+
+
+async def _refresh_search_terms(docs: List[dict]):
+    """
+    Recompute search fields from each document's current name/description. The
+    filter includes the text the terms were derived from, so a concurrent update
+    that changed it again is not overwritten with stale terms.
+    """
+    await _bulk_write([
+        UpdateOne(
+            {"_id": doc["_id"], "name": doc.get("name"), "description": doc.get("description")},
+            {"$set": search_terms(doc.get("name"), doc.get("description"))}
+        )
+        for doc in docs
+    ])
+
+async def rebuild_search_terms() -> int:
+    """Backfill search fields for every product (e.g. products created before search existed)."""
+    updated = 0
+    batch = []
+    async for doc in products_collection.find({}, {"name": 1, "description": 1}).batch_size(BULK_CHUNK_SIZE):
+        batch.append(doc)
+        if len(batch) >= BULK_CHUNK_SIZE:
+            await _refresh_search_terms(batch)
+            updated += len(batch)
+            batch = []
+    if batch:
+        await _refresh_search_terms(batch)
+        updated += len(batch)
+    return updated
+
+def _term_score(term: str) -> dict:
+    prefix = f"^{re.escape(term)}"
+
+    def matches_prefix(field: str) -> dict:
+        return {"$gt": [{"$size": {"$filter": {
+            "input": field, "cond": {"$regexMatch": {"input": "$$this", "regex": prefix}}
+        }}}, 0]}
+
+    return {"$switch": {
+        "branches": [
+            {"case": {"$in": [term, "$name_terms"]}, "then": 3},
+            {"case": matches_prefix("$name_terms"), "then": 2},
+            {"case": matches_prefix("$search_terms"), "then": 1},
+        ],
+        # Hanya cocok lewat toleransi typo
+        "default": 0.5
+    }}
+
+def _price_band(bucket: dict) -> dict:
+    if bucket["_id"] == "other":
+        return {"min": PRICE_BANDS[-1], "max": None, "count": bucket["count"]}
+    upper = PRICE_BANDS[PRICE_BANDS.index(bucket["_id"]) + 1]
+    return {"min": bucket["_id"], "max": upper, "count": bucket["count"]}
+
+async def search_products(query: str, category: Optional[str] = None, skip: int = 0, limit: int = 20) -> dict:
+    """
+    Prefix search over product name/description with relevance ranking, plus
+    category and price-band facets, in one aggregation. Every query term must
+    match (as a prefix of some term, or as a prefix minus a trailing typo).
+    Raises ValueError when the query has no searchable terms.
+    """
+    terms = tokenize(query)[:MAX_QUERY_TERMS]
+    if not terms:
+        raise ValueError("Query must contain at least one letter or digit")
+
+    match = {"$and": [
+        {"search_terms": {"$in": [re.compile(f"^{re.escape(prefix)}") for prefix in query_prefixes(term)]}}
+        for term in terms
+    ]}
+    if category:
+        match["category"] = category
+
+    pipeline = [
+        {"$match": match},
+        # Skor dihitung untuk semua yang cocok sebelum dipotong, jadi kandidat yang
+        # tersisa adalah yang paling relevan. $sort + $limit digabung Mongo menjadi
+        # top-k sort, memorinya sebesar SEARCH_MAX_CANDIDATES, bukan semua hasil.
+        {"$addFields": {"score": {"$add": [_term_score(term) for term in terms]}}},
+        {"$sort": {"score": -1, "_id": 1}},
+        {"$limit": SEARCH_MAX_CANDIDATES + 1},
+        {"$facet": {
+            "results": [
+                # $facet meneruskan dokumen dalam urutan di atas
+                {"$skip": skip},
+                {"$limit": limit},
+                {"$project": PRODUCT_PROJECTION},
+            ],
+            "total": [{"$count": "count"}],
+            "categories": [
+                {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+            ],
+            "price_bands": [{"$bucket": {
+                "groupBy": "$price",
+                "boundaries": PRICE_BANDS,
+                "default": "other",
+                "output": {"count": {"$sum": 1}}
+            }}],
+        }},
+    ]
+    facets = (await products_collection.aggregate(pipeline).to_list(length=1))[0]
+    total = facets["total"][0]["count"] if facets["total"] else 0
+    return {
+        "results": facets["results"],
+        "total": min(total, SEARCH_MAX_CANDIDATES),
+        # Lebih dari SEARCH_MAX_CANDIDATES hasil: total dan facet hanya atas kandidat
+        # dengan skor tertinggi; urutan hasil tetap benar
+        "truncated": total > SEARCH_MAX_CANDIDATES,
+        "categories": [{"category": c["_id"], "count": c["count"]} for c in facets["categories"]],
+        "price_bands": [_price_band(bucket) for bucket in facets["price_bands"]],
+    }
+
+async def _bulk_write(requests: list):
+    """
+    Run an unordered bulk_write. Returns (matched count for updates, or deleted
+    count for deletes, {index in requests: error message}) so callers can report
+    a result per item.
+    """
+    if not requests:
+        return 0, {}
+    try:
+        result = await products_collection.bulk_write(requests, ordered=False)
+    except BulkWriteError as e:
+        errors = {error["index"]: error["errmsg"] for error in e.details.get("writeErrors", [])}
+        return e.details.get("nMatched", 0) + e.details.get("nRemoved", 0), errors
+    return result.matched_count + result.deleted_count, {}
+
+async def bulk_create_products(products: List[ProductCreate]) -> List[dict]:
+    results = []
+    logs = []
+    for start in range(0, len(products), BULK_CHUNK_SIZE):
+        chunk = products[start:start + BULK_CHUNK_SIZE]
+        docs = [Product(**product.dict()).dict(by_alias=True) for product in chunk]
+        for doc in docs:
+            doc.update(search_terms(doc["name"], doc["description"]))
+        _, errors = await _bulk_write([InsertOne(doc) for doc in docs])
+        for i, doc in enumerate(docs):
+            if i in errors:
+                results.append({"index": start + i, "id": doc["_id"], "status": "error", "error": errors[i]})
+                continue
+            results.append({"index": start + i, "id": doc["_id"], "status": "created"})
+            logs.append({
+                "action": "create",
+                "resource": "product",
+                "resource_id": doc["_id"],
+                "user_id": doc["_id"],
+                "details": {"name": doc["name"]}
+            })
+    await create_activity_logs(logs, wait=False)
+    return results
+
+async def bulk_update_products(items: List[ProductBulkUpdateItem]) -> List[dict]:
+    results = []
+    logs = []
+    for start in range(0, len(items), BULK_CHUNK_SIZE):
+        chunk = items[start:start + BULK_CHUNK_SIZE]
+        requests = []
+        pending = []  # (index, product_id, update_data) per request
+        for i, item in enumerate(chunk):
+            update_data = {k: v for k, v in item.dict(exclude_unset=True, exclude={"id"}).items() if v is not None}
+            if not ObjectId.is_valid(item.id):
+                results.append({"index": start + i, "id": item.id, "status": "error", "error": "Invalid id"})
+            elif not update_data:
+                results.append({"index": start + i, "id": item.id, "status": "error", "error": "No fields to update"})
+            else:
+                update_data["updated_at"] = datetime.utcnow()
+                requests.append(UpdateOne({"_id": item.id}, {"$set": update_data}))
+                pending.append((start + i, item.id, update_data))
+
+        matched, errors = await _bulk_write(requests)
+        ok_ids = [product_id for j, (_, product_id, _) in enumerate(pending) if j not in errors]
+        existing = set(ok_ids)
+        # Hanya baca ulang kalau ada update yang tidak menemukan dokumennya
+        if matched < len(ok_ids):
+            existing = {doc["_id"] for doc in await products_collection.find(
+                {"_id": {"$in": ok_ids}}, {"_id": 1}
+            ).to_list(length=None)}
+
+        text_changed = [
+            product_id for j, (_, product_id, update_data) in enumerate(pending)
+            if j not in errors and ("name" in update_data or "description" in update_data)
+        ]
+        if text_changed:
+            await _refresh_search_terms(await products_collection.find(
+                {"_id": {"$in": text_changed}}, {"name": 1, "description": 1}
+            ).to_list(length=None))
+
+        for j, (index, product_id, update_data) in enumerate(pending):
+            if j in errors:
+                results.append({"index": index, "id": product_id, "status": "error", "error": errors[j]})
+            elif product_id not in existing:
+                results.append({"index": index, "id": product_id, "status": "not_found"})
+            else:
+                results.append({"index": index, "id": product_id, "status": "updated"})
+                logs.append({
+                    "action": "update",
+                    "resource": "product",
+                    "resource_id": product_id,
+                    "user_id": product_id,
+                    "details": update_data
+                })
+        await cache.invalidate_many([f"product:{product_id}" for _, product_id, _ in pending])
+    await create_activity_logs(logs, wait=False)
+    return sorted(results, key=lambda r: r["index"])
+
+async def bulk_delete_products(product_ids: List[str]) -> List[dict]:
+    results = []
+    logs = []
+    for start in range(0, len(product_ids), BULK_CHUNK_SIZE):
+        chunk = product_ids[start:start + BULK_CHUNK_SIZE]
+        valid_ids = [product_id for product_id in chunk if ObjectId.is_valid(product_id)]
+        names = {doc["_id"]: doc.get("name") for doc in await products_collection.find(
+            {"_id": {"$in": valid_ids}}, {"name": 1}
+        ).to_list(length=None)}
+        # Id ganda cukup satu DeleteOne, supaya jumlah yang terhapus bisa dicocokkan
+        found = list(dict.fromkeys(product_id for product_id in valid_ids if product_id in names))
+        deleted, errors = await _bulk_write([DeleteOne({"_id": product_id}) for product_id in found])
+        failed = {found[j]: message for j, message in errors.items()}
+        gone = set()
+        if deleted < len(found) - len(failed):
+            # Sebagian sudah dihapus request lain di antara baca dan hapus. bulk_write hanya
+            # memberi jumlah, jadi id mana yang dihapus di sini tidak bisa dipastikan;
+            # semuanya dilaporkan not_found dan tidak di-log daripada di-log ganda
+            gone = {product_id for product_id in found if product_id not in failed}
+            if deleted:
+                logger.warning(
+                    "Bulk delete raced with another delete: removed %d of %d products, all reported as not_found",
+                    deleted, len(gone)
+                )
+
+        for i, product_id in enumerate(chunk):
+            if not ObjectId.is_valid(product_id):
+                results.append({"index": start + i, "id": product_id, "status": "error", "error": "Invalid id"})
+            elif product_id in failed:
+                results.append({"index": start + i, "id": product_id, "status": "error", "error": failed[product_id]})
+            elif product_id not in names or product_id in gone:
+                results.append({"index": start + i, "id": product_id, "status": "not_found"})
+            else:
+                results.append({"index": start + i, "id": product_id, "status": "deleted"})
+                # Id yang sama dua kali di satu request hanya dihapus (dan di-log) sekali
+                logs.append({
+                    "action": "delete",
+                    "resource": "product",
+                    "resource_id": product_id,
+                    "user_id": product_id,
+                    "details": {"name": names.pop(product_id)}
+                })
+        await cache.invalidate_many([f"product:{product_id}" for product_id in found])
+    await create_activity_logs(logs, wait=False)
+    return results
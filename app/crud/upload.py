@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import Optional
+from pymongo import ReturnDocument, IndexModel
+from app.database import get_database
+from app.utils.index_registry import index_registry
+
+db = get_database()
+# Satu dokumen per isi file unik: {_id: sha256, filename, size, refcount, created_at}
+uploads_collection = db["uploads"]
+
+index_registry.register(uploads_collection, IndexModel("filename", unique=True))
+index_registry.register_query("uploads.by_filename", uploads_collection, {"filename": "x.jpg", "refcount": {"$gt": 0}})
+
+async def add_upload_reference(digest: str, filename: str, size: int) -> dict:
+    """
+    Count one more reference to the content with this digest. Returns the index
+    document; refcount == 1 means the content was not stored before. For a
+    duplicate, filename is the name the content was first stored under.
+    """
+    return await uploads_collection.find_one_and_update(
+        {"_id": digest},
+        {
+            "$inc": {"refcount": 1},
+            "$setOnInsert": {"filename": filename, "size": size, "created_at": datetime.utcnow()}
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+
+async def release_upload_reference(filename: str) -> Optional[int]:
+    """
+    Drop one reference. Returns the remaining count (0 means the file should be
+    removed), or None when the file is not tracked (uploaded before dedup existed).
+    """
+    doc = await uploads_collection.find_one_and_update(
+        {"filename": filename, "refcount": {"$gt": 0}},
+        {"$inc": {"refcount": -1}},
+        return_document=ReturnDocument.AFTER
+    )
+    if doc is None:
+        return None
+    if doc["refcount"] > 0:
+        return doc["refcount"]
+    # Kalau sempat di-upload ulang di antara dua perintah ini, dokumennya tetap ada
+    result = await uploads_collection.delete_one({"_id": doc["_id"], "refcount": {"$lte": 0}})
+    return 0 if result.deleted_count == 1 else 1
+
+async def upload_reference_count(filename: str) -> int:
+    """Current number of references to this file (0 when it is not tracked)."""
+    doc = await uploads_collection.find_one({"filename": filename, "refcount": {"$gt": 0}}, {"refcount": 1})
+    return doc["refcount"] if doc else 0
@@ -1,34 +1,54 @@
 from typing import List, Optional
 from bson import ObjectId
+from pymongo import ReturnDocument, IndexModel
 from app.database import get_database
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.crud.activity_log import create_activity_log
+from app.utils.cache import cache
+from app.utils.password_utils import hash_password
+from app.utils.auth_utils import invalidate_principal
+from app.utils.index_registry import index_registry
 from datetime import datetime
 
 db = get_database()
 users_collection = db["users"]
 
+# Login dan cek "Email already registered" mencari berdasarkan email
+index_registry.register(users_collection, IndexModel("email", unique=True))
+index_registry.register_query("users.by_email", users_collection, {"email": "user@example.com"})
+
+# Hash password hanya dibaca untuk login (get_user_by_email); dokumen lain, termasuk
+# yang masuk cache, tidak membawanya
+USER_PROJECTION = {"password": 0}
+
 async def create_user(user: UserCreate) -> User:
     user_dict = user.dict()
-    user_dict["password"] = user_dict["password"]  
+    user_dict["password"] = await hash_password(user_dict["password"])
     new_user = User(**user_dict)
-    result = await users_collection.insert_one(new_user.dict(by_alias=True))
+    user_doc = new_user.dict(by_alias=True)
+    # Dokumen yang di-insert sudah lengkap, tidak perlu dibaca ulang
+    await users_collection.insert_one(user_doc)
     
     # Log activity - FIXED: reference to 'product' changed to 'user'
     await create_activity_log(
         action="create",
         resource="user",
-        resource_id=result.inserted_id,
-        user_id=result.inserted_id,  
-        details={"email": user.email, "full_name": user.full_name}
+        resource_id=user_doc["_id"],
+        user_id=user_doc["_id"],  
+        details={"email": user.email, "full_name": user.full_name},
+        wait=False
     )
     
-    created_user = await users_collection.find_one({"_id": result.inserted_id})
-    return User(**created_user)
+    return User(**user_doc)
+
+async def get_user_docs(skip: int = 0, limit: int = 100, projection: Optional[dict] = None) -> List[dict]:
+    """A page of users as raw documents, without the password hash unless a projection asks for it."""
+    return await users_collection.find({}, projection or USER_PROJECTION).skip(skip).limit(limit).to_list(length=limit)
 
 async def get_users(skip: int = 0, limit: int = 100) -> List[User]:
-    users = await users_collection.find().skip(skip).limit(limit).to_list(length=limit)
+    # User butuh password, jadi dibaca lengkap di sini
+    users = await users_collection.find({}).skip(skip).limit(limit).to_list(length=limit)
     return [User(**user) for user in users]
 
 # async def get_user(user_id: str) -> Optional[User]:
@@ -37,12 +57,28 @@ async def get_users(skip: int = 0, limit: int = 100) -> List[User]:
 #         if user:
 #             return User(**user)
 #     return None
+async def get_user_doc(user_id: str, projection: Optional[dict] = None) -> Optional[dict]:
+    """
+    A user without the password hash, through the read-through cache (the
+    returned dict is shared; do not modify it). A projection (sparse fieldset) is
+    answered from the cached user when there is one, else fetched uncached.
+    """
+    if ObjectId.is_valid(user_id):
+        key = f"user:{user_id}"
+        if projection is not None:
+            return cache.peek(key) or await users_collection.find_one({"_id": user_id}, projection)
+        return await cache.get_or_load(
+            key,
+            lambda: users_collection.find_one({"_id": user_id}, USER_PROJECTION)
+        )
+    return None
+
 async def get_user(user_id: str) -> Optional[User]:
+    # Tidak lewat cache: dokumen di cache tidak punya password yang dibutuhkan User
     if ObjectId.is_valid(user_id):
         doc = await users_collection.find_one({"_id": user_id})
-        print(f"{doc=}")
         if doc:
-            return User(**doc)   
+            return User(**doc)
     return None
 
 async def get_user_by_email(email: str) -> Optional[User]:
@@ -57,39 +93,54 @@ async def update_user(user_id: str, user: UserUpdate) -> Optional[User]:
     if update_data:
     
         update_data["updated_at"] = datetime.utcnow()
+        if "password" in update_data:
+            update_data["password"] = await hash_password(update_data["password"])
 
-        result = await users_collection.update_one(
+        updated_user = await users_collection.find_one_and_update(
             {"_id": user_id},  
-            {"$set": update_data}
+            {"$set": update_data},
+            return_document=ReturnDocument.AFTER
         )
 
-        if result.modified_count == 1:
+        if updated_user:
+            await cache.invalidate(f"user:{user_id}")
+            invalidate_principal(user_id)
             await create_activity_log(
                 action="update",
                 resource="user",
                 resource_id=user_id,
                 user_id=user_id,
-                details=update_data
+                # Hash password tidak ikut dicatat di log
+                details={k: v for k, v in update_data.items() if k != "password"},
+                wait=False
             )
 
-            updated_user = await users_collection.find_one({"_id": user_id})
             return User(**updated_user)
 
     return None
 
+async def update_password_hash(user_id: str, password_hash: str):
+    """Replace a stored password hash after a transparent rehash on login."""
+    await users_collection.update_one({"_id": user_id}, {"$set": {"password": password_hash}})
+    await cache.invalidate(f"user:{user_id}")
+    invalidate_principal(user_id)
+
 async def delete_user(user_id: str) -> bool:
     if ObjectId.is_valid(user_id):
-        user = await users_collection.find_one({"_id": user_id})
-        
-        result = await users_collection.delete_one({"_id": user_id})
-        if result.deleted_count == 1:
-            
+        user = await users_collection.find_one_and_delete(
+            {"_id": user_id},
+            projection={"email": 1, "full_name": 1}
+        )
+        if user:
+            await cache.invalidate(f"user:{user_id}")
+            invalidate_principal(user_id)
             await create_activity_log(
                 action="delete",
                 resource="user",
                 resource_id=user_id,
                 user_id=user_id,  
-                details={"email": user["email"], "full_name": user["full_name"]} if user else {}
+                details={"email": user["email"], "full_name": user["full_name"]},
+                wait=False
             )
             return True
     return False
\ No newline at end of file
@@ -1,14 +1,72 @@
-import os
+from typing import Optional
 from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
+from app.config import settings
+from app.utils.pool_metrics import pool_metrics
+from app.utils.metrics import command_metrics
+from app.utils.slow_queries import slow_query_log
 
-load_dotenv()
+# Client dibuat di lifespan app (setelah worker di-fork), atau saat pertama dipakai
+# oleh script seperti manage.py. Modul crud hanya memegang proxy yang lazy.
+_client: Optional[AsyncIOMotorClient] = None
+# Naik setiap client diganti, supaya proxy collection tidak memakai client lama
+_generation = 0
 
-MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
-DATABASE_NAME = os.getenv("DATABASE_NAME", "fastapi_crud")
+def connect() -> AsyncIOMotorClient:
+    global _client, _generation
+    if _client is None:
+        listeners = [pool_metrics, command_metrics]
+        if slow_query_log is not None:
+            listeners.append(slow_query_log)
+        _client = AsyncIOMotorClient(
+            settings.mongodb_url,
+            event_listeners=listeners,
+            **settings.mongo_client_options()
+        )
+        _generation += 1
+    return _client
 
-client = AsyncIOMotorClient(MONGODB_URL)
-database = client[DATABASE_NAME]
+def close():
+    global _client, _generation
+    if _client is not None:
+        _client.close()
+        _client = None
+        _generation += 1
+
+def get_client() -> AsyncIOMotorClient:
+    return connect()
+
+class LazyCollection:
+    """Stands in for a Motor collection and resolves it against the current client on use."""
+
+    def __init__(self, database_name: str, name: str):
+        self.name = name
+        self._database_name = database_name
+        self._resolved = (0, None)
+
+    def _collection(self):
+        generation, collection = self._resolved
+        if collection is None or generation != _generation or _client is None:
+            collection = connect()[self._database_name][self.name]
+            self._resolved = (_generation, collection)
+        return collection
+
+    def __getattr__(self, attr):
+        return getattr(self._collection(), attr)
+
+    def __repr__(self):
+        return f"LazyCollection({self._database_name!r}, {self.name!r})"
+
+class LazyDatabase:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getitem__(self, name: str) -> LazyCollection:
+        return LazyCollection(self.name, name)
+
+    def __getattr__(self, attr):
+        return getattr(connect()[self.name], attr)
+
+database = LazyDatabase(settings.database_name)
 
 def get_database():
-    return database
\ No newline at end of file
+    return database
@@ -0,0 +1,39 @@
+import jwt
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from app.crud.user import get_user_by_email
+from app.models.user import User
+from app.utils.auth_utils import decode_access_token, get_cached_principal, cache_principal
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"}
+    )
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)
+) -> User:
+    if credentials is None:
+        raise _unauthorized("Not authenticated")
+    token = credentials.credentials
+
+    # Token yang sama tidak perlu diverifikasi ulang maupun dicari ke database
+    user = get_cached_principal(token)
+    if user is not None:
+        return user
+
+    try:
+        payload = decode_access_token(token)
+    except jwt.InvalidTokenError:
+        raise _unauthorized("Invalid or expired token")
+
+    user = await get_user_by_email(payload.get("sub"))
+    if not user or not user.is_active:
+        raise _unauthorized("User not found or inactive")
+
+    cache_principal(token, user, payload["exp"])
+    return user
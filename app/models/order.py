@@ -7,7 +7,7 @@ from .user import PyObjectId
 class OrderItem(BaseModel):
     product_id: PyObjectId
     quantity: int
-    price: float
+    price: float  # harga satuan saat order dibuat
 
 class Order(BaseModel):
     id: Optional[PyObjectId] = Field(default_factory=PyObjectId, alias="_id")
@@ -31,7 +31,7 @@ class Order(BaseModel):
                         "price": 199.98
                     }
                 ],
-                "total_amount": 199.98,
+                "total_amount": 399.96,
                 "status": "pending"
             }
         }
\ No newline at end of file
@@ -1,16 +1,49 @@
 from fastapi import APIRouter, HTTPException, status, Query
-from typing import List, Optional
+from typing import List, Optional, Union
+from datetime import datetime, timedelta, timezone
 from app.crud.activity_log import (
-    get_activity_logs, 
-    get_top_activities, 
+    get_activity_logs,
+    get_top_activities,
     get_activity_log_by_id,
     get_activity_logs_by_user,
-    get_activity_logs_by_resource
+    get_activity_logs_by_resource,
+    next_activity_log_cursor,
+    iter_activity_logs
 )
-from app.schemas.activity_log import ActivityLogResponse, TopActivityResponse
+from app.crud.activity_rollup import get_activity_stats
+from app.models.activity_log import ActivityLog
+from app.schemas.activity_log import ActivityLogResponse, ActivityLogPage, TopActivityResponse, ActivityStatsBucket
+from app.utils.export_utils import fields_projection, export_response
+from app.utils.query_params import CURSOR_DESCRIPTION, selected_fields
+from app.utils.serialization import FastJSONResponse, to_response_list
 
 router = APIRouter(prefix="/v1/activity-logs", tags=["activity-logs"])
 
+def _log_response(log: ActivityLog) -> ActivityLogResponse:
+    return ActivityLogResponse(
+        id=str(log.id),
+        action=log.action,
+        resource=log.resource,
+        resource_id=str(log.resource_id) if log.resource_id else None,
+        user_id=str(log.user_id) if log.user_id else None,
+        details=log.details,
+        created_at=log.created_at
+    )
+
+LOG_FIELDS = list(ActivityLogResponse.model_fields)
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Query "...Z" atau "+07:00" menjadi datetime aware; di Mongo semua waktu naive UTC
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _logs_response(docs: List[dict], limit: int, cursor: Optional[str]) -> FastJSONResponse:
+    items = to_response_list(docs, LOG_FIELDS)
+    if cursor is None:
+        return FastJSONResponse(items)
+    return FastJSONResponse({"items": items, "next_cursor": next_activity_log_cursor(docs, limit)})
+
 @router.get("/top-activities", response_model=List[TopActivityResponse])
 async def read_top_activities(limit: int = Query(5, description="Number of top activities to return")):
     try:
@@ -22,30 +55,50 @@ async def read_top_activities(limit: int = Query(5, description="Number of top a
             detail=f"Error retrieving top activities: {str(e)}"
         )
 
-@router.get("/", response_model=List[ActivityLogResponse])
+@router.get("/stats", response_model=List[ActivityStatsBucket])
+async def read_activity_stats(
+    start: Optional[datetime] = Query(None, description="Range start (UTC), default 24 hours before end"),
+    end: Optional[datetime] = Query(None, description="Range end (UTC, exclusive), default now"),
+    granularity: str = Query("hour", pattern="^(minute|hour|day)$", description="minute, hour or day"),
+    action: Optional[str] = Query(None, description="Only this action"),
+    resource: Optional[str] = Query(None, description="Only this resource")
+):
+    end = _naive_utc(end) or datetime.utcnow()
+    start = _naive_utc(start) or end - timedelta(days=1)
+    try:
+        return await get_activity_stats(start, end, granularity, action, resource)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.get("/", response_model=Union[List[ActivityLogResponse], ActivityLogPage])
 async def read_activity_logs(
     skip: int = Query(0, description="Number of records to skip"),
-    limit: int = Query(100, description="Number of records to return")
+    limit: int = Query(100, description="Number of records to return"),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION)
 ):
     try:
-        logs = await get_activity_logs(skip, limit)
-        return [
-            ActivityLogResponse(
-                id=str(log.id),
-                action=log.action,
-                resource=log.resource,
-                resource_id=str(log.resource_id) if log.resource_id else None,
-                user_id=str(log.user_id) if log.user_id else None,
-                details=log.details,
-                created_at=log.created_at
-            ) for log in logs
-        ]
+        logs = await get_activity_logs(skip, limit, cursor, raw=True)
+        return _logs_response(logs, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving activity logs: {str(e)}"
         )
 
+@router.get("/export", summary="Export Activity Logs")
+async def export_activity_logs(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    fields: Optional[str] = Query(None, description="Comma separated fields to include"),
+    start: Optional[datetime] = Query(None, description="Only logs created at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only logs created before this time"),
+    batch_size: int = Query(1000, ge=1, le=10000, description="Documents fetched from Mongo per batch")
+):
+    selected = selected_fields(fields, LOG_FIELDS)
+    cursor = iter_activity_logs(start, end, fields_projection(selected), batch_size)
+    return export_response(cursor, selected or LOG_FIELDS, format, "activity_logs")
+
 @router.get("/{log_id}", response_model=ActivityLogResponse)
 async def read_activity_log(log_id: str):
     log = await get_activity_log_by_id(log_id)
@@ -54,64 +107,42 @@ async def read_activity_log(log_id: str):
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Activity log not found"
         )
-    
-    return ActivityLogResponse(
-        id=str(log.id),
-        action=log.action,
-        resource=log.resource,
-        resource_id=str(log.resource_id) if log.resource_id else None,
-        user_id=str(log.user_id) if log.user_id else None,
-        details=log.details,
-        created_at=log.created_at
-    )
 
-@router.get("/user/{user_id}", response_model=List[ActivityLogResponse])
+    return _log_response(log)
+
+@router.get("/user/{user_id}", response_model=Union[List[ActivityLogResponse], ActivityLogPage])
 async def read_activity_logs_by_user(
     user_id: str,
     skip: int = Query(0, description="Number of records to skip"),
-    limit: int = Query(100, description="Number of records to return")
+    limit: int = Query(100, description="Number of records to return"),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION)
 ):
     try:
-        logs = await get_activity_logs_by_user(user_id, skip, limit)
-        return [
-            ActivityLogResponse(
-                id=str(log.id),
-                action=log.action,
-                resource=log.resource,
-                resource_id=str(log.resource_id) if log.resource_id else None,
-                user_id=str(log.user_id) if log.user_id else None,
-                details=log.details,
-                created_at=log.created_at
-            ) for log in logs
-        ]
+        logs = await get_activity_logs_by_user(user_id, skip, limit, cursor, raw=True)
+        return _logs_response(logs, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving activity logs for user: {str(e)}"
         )
 
-@router.get("/resource/{resource}/{resource_id}", response_model=List[ActivityLogResponse])
+@router.get("/resource/{resource}/{resource_id}", response_model=Union[List[ActivityLogResponse], ActivityLogPage])
 async def read_activity_logs_by_resource(
     resource: str,
     resource_id: str,
     skip: int = Query(0, description="Number of records to skip"),
-    limit: int = Query(100, description="Number of records to return")
+    limit: int = Query(100, description="Number of records to return"),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION)
 ):
     try:
-        logs = await get_activity_logs_by_resource(resource, resource_id, skip, limit)
-        return [
-            ActivityLogResponse(
-                id=str(log.id),
-                action=log.action,
-                resource=log.resource,
-                resource_id=str(log.resource_id) if log.resource_id else None,
-                user_id=str(log.user_id) if log.user_id else None,
-                details=log.details,
-                created_at=log.created_at
-            ) for log in logs
-        ]
+        logs = await get_activity_logs_by_resource(resource, resource_id, skip, limit, cursor, raw=True)
+        return _logs_response(logs, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving activity logs for resource: {str(e)}"
-        )
\ No newline at end of file
+        )
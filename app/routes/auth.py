@@ -1,7 +1,10 @@
-from fastapi import APIRouter, HTTPException
-from app.schemas.user import UserLogin
-from app.crud.user import get_user_by_email
+from fastapi import APIRouter, HTTPException, Depends
+from app.schemas.user import UserLogin, UserResponse
+from app.crud.user import get_user_by_email, update_password_hash
 from app.utils.auth_utils import create_access_token
+from app.utils.password_utils import verify_password
+from app.dependencies import get_current_user
+from app.models.user import User
 
 router = APIRouter(
     prefix="/api/v1/auth",
@@ -14,9 +17,14 @@ async def login(data: UserLogin):
     if not user:
         raise HTTPException(status_code=400, detail="Email tidak ditemukan")
 
-    if user.password != data.password:
+    valid, new_hash = await verify_password(data.password, user.password)
+    if not valid:
         raise HTTPException(status_code=400, detail="Password salah")
 
+    # Password lama (plaintext / cost berbeda) di-hash ulang secara transparan
+    if new_hash:
+        await update_password_hash(str(user.id), new_hash)
+
 
     token = create_access_token({"sub": user.email, "role": user.role})
 
@@ -29,3 +37,17 @@ async def login(data: UserLogin):
             "role": user.role
         }
     }
+
+@router.get("/me", response_model=UserResponse)
+async def read_current_user(user: User = Depends(get_current_user)):
+    return UserResponse(
+        id=str(user.id),
+        email=user.email,
+        full_name=user.full_name,
+        role=user.role,
+        is_active=user.is_active,
+        phone=user.phone,
+        profile_picture=user.profile_picture,
+        created_at=user.created_at,
+        updated_at=user.updated_at
+    )
@@ -0,0 +1,108 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import PlainTextResponse
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from app.database import get_client
+from app.utils.profiler import profile_store
+from app.utils.query_plans import plan_stages
+from app.utils.serialization import FastJSONResponse
+from app.utils.slow_queries import SlowQueryLog, slow_query_log
+
+
+def require_debug_token(x_debug_token: Optional[str] = Header(None)):
+    # Tanpa DEBUG_TOKEN endpoint ini dianggap tidak ada
+    if not settings.debug_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_debug_token or not secrets.compare_digest(x_debug_token, settings.debug_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid debug token")
+
+
+router = APIRouter(
+    prefix="/v1/debug",
+    tags=["Debug"],
+    dependencies=[Depends(require_debug_token)],
+    include_in_schema=False
+)
+
+PROFILE_SORT_PATTERN = "^(cumulative|tottime|ncalls|filename|name)$"
+
+
+def _without_private(doc: dict) -> dict:
+    return {key: value for key, value in doc.items() if not key.startswith("_")}
+
+
+@router.get("/profiles")
+async def list_profiles():
+    return FastJSONResponse(profile_store.list())
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile_summary(
+    profile_id: str,
+    sort: str = Query("cumulative", pattern=PROFILE_SORT_PATTERN),
+    limit: int = Query(50, ge=1, le=500)
+):
+    summary = profile_store.summary(profile_id, sort=sort, limit=limit)
+    if summary is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return PlainTextResponse(summary)
+
+
+@router.get("/profiles/{profile_id}/download")
+async def download_profile(profile_id: str):
+    data = profile_store.dump(profile_id)
+    if data is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return Response(
+        content=data,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'}
+    )
+
+
+async def _plan_summary(entry: dict) -> Optional[dict]:
+    command = SlowQueryLog.explain_command(entry)
+    if command is None:
+        return None
+    try:
+        explain = await get_client()[entry["database"]].command("explain", command, verbosity="queryPlanner")
+    except PyMongoError as e:
+        return {"error": str(e)}
+    return {"stages": plan_stages(explain)}
+
+
+@router.get("/slow-queries")
+async def list_slow_queries(
+    group: bool = Query(False, description="Group by command, collection and query shape"),
+    explain: bool = Query(False, description="Add the current winning plan of each entry"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    if slow_query_log is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Slow query log is disabled")
+
+    if group:
+        rows = slow_query_log.summary()[:limit]
+        entries = [row["_entry"] for row in rows]
+    else:
+        entries = slow_query_log.entries(private=True)[:limit]
+        rows = entries
+
+    items = []
+    for row, entry in zip(rows, entries):
+        item = _without_private(row)
+        if explain:
+            # Explain dijalankan sekarang, jadi plan bisa berbeda dari saat query lambat tercatat
+            item["plan"] = await _plan_summary(entry)
+        items.append(item)
+    return FastJSONResponse({"threshold_ms": slow_query_log.threshold_ms, "items": items})
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_queries():
+    if slow_query_log is not None:
+        slow_query_log.clear()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException, status, Query
+from fastapi.responses import FileResponse
+from typing import Optional
+import os
+from app.routes.upload import UPLOAD_DIR
+from app.utils.image_variants import variant_cache, snap_width, VARIANT_FORMATS, VARIANT_WIDTHS
+
+router = APIRouter(tags=["upload"])
+
+# Nama file hasil upload tidak pernah berubah isinya, jadi aman di-cache lama oleh client
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@router.get("/uploads/{filename}", summary="Get Uploaded Image Or A Resized Variant")
+async def read_image(
+    filename: str,
+    w: Optional[int] = Query(None, ge=1, description=f"Target width, rounded up to one of {VARIANT_WIDTHS}"),
+    fmt: Optional[str] = Query(None, pattern="^(webp|jpeg|png)$", description="Output format: webp, jpeg or png")
+):
+    if os.path.basename(filename) != filename or filename.startswith("."):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    source_path = os.path.join(UPLOAD_DIR, filename)
+    if not os.path.isfile(source_path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+
+    if w is None and fmt is None:
+        return FileResponse(source_path, headers={"Cache-Control": CACHE_CONTROL})
+
+    width = snap_width(w) if w else None
+    if fmt is None:
+        fmt = "png" if filename.lower().endswith(".png") else "jpeg"
+    try:
+        variant_path = await variant_cache.get(source_path, filename, width, fmt)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Error creating image variant: {str(e)}"
+        )
+    return FileResponse(
+        variant_path,
+        media_type=VARIANT_FORMATS[fmt][1],
+        headers={"Cache-Control": CACHE_CONTROL}
+    )
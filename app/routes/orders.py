@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import List
+from app.crud.order import (
+    place_order, get_order, get_orders_by_user, ProductNotFound, InsufficientStock
+)
+from app.dependencies import get_current_user
+from app.models.order import Order
+from app.models.user import User
+from app.schemas.order import OrderCreate, OrderResponse, OrderItemResponse
+
+router = APIRouter(prefix="/api/v1/orders", tags=["Orders"])
+
+def _order_response(order: Order) -> OrderResponse:
+    return OrderResponse(
+        id=str(order.id),
+        user_id=str(order.user_id),
+        items=[
+            OrderItemResponse(product_id=str(item.product_id), quantity=item.quantity, price=item.price)
+            for item in order.items
+        ],
+        total_amount=order.total_amount,
+        status=order.status,
+        created_at=order.created_at,
+        updated_at=order.updated_at
+    )
+
+@router.post(
+    "/",
+    response_model=OrderResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Place Order",
+)
+async def create_new_order(order: OrderCreate, current_user: User = Depends(get_current_user)):
+    try:
+        created_order = await place_order(str(current_user.id), order.items)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except ProductNotFound as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except InsufficientStock as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error placing order: {str(e)}"
+        )
+    return _order_response(created_order)
+
+@router.get("/", response_model=List[OrderResponse], summary="Get My Orders")
+async def read_my_orders(
+    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    limit: int = Query(100, ge=1, le=500, description="Number of records to return"),
+    current_user: User = Depends(get_current_user)
+):
+    orders = await get_orders_by_user(str(current_user.id), skip, limit)
+    return [_order_response(order) for order in orders]
+
+@router.get("/{order_id}", response_model=OrderResponse, summary="Get Order by ID")
+async def read_order(order_id: str, current_user: User = Depends(get_current_user)):
+    order = await get_order(order_id)
+    # Order milik user lain dilaporkan sebagai tidak ada, kecuali untuk admin
+    if not order or (str(order.user_id) != str(current_user.id) and current_user.role != "admin"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+    return _order_response(order)
@@ -1,21 +1,48 @@
-from fastapi import APIRouter, HTTPException, status, Query
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, status, Query, Body, Request
+from typing import List, Optional, Union
+from datetime import datetime
 from app.crud.product import (
     create_product,
-    get_products,
-    get_product,
+    get_product_listing,
+    next_product_cursor,
+    get_top_product_docs,
+    get_product_doc,
     update_product,
     delete_product,
-    get_top_products,
-    create_category_index
+    iter_products,
+    bulk_create_products,
+    bulk_update_products,
+    bulk_delete_products,
+    search_products
 )
-from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse
+from app.schemas.product import (
+    ProductCreate, ProductUpdate, ProductResponse, ProductPage, ProductBulkUpdateItem, BulkResponse,
+    ProductSearchHit, ProductSearchResponse
+)
+from app.utils.export_utils import fields_projection, export_response
+from app.utils.query_params import CURSOR_DESCRIPTION, fields_description, selected_fields
+from app.utils.etag_utils import (
+    resource_etag, collection_etag, is_not_modified, set_validators, not_modified_response
+)
+from app.utils.serialization import FastJSONResponse, to_response, to_response_list, response_projection
 
 router = APIRouter(prefix="/api/v1/products", tags=["products"])
 
-@router.on_event("startup")
-async def startup_event():
-    await create_category_index()
+MAX_BULK_ITEMS = 10000
+PRODUCT_FIELDS = list(ProductResponse.model_fields)
+SEARCH_HIT_FIELDS = list(ProductSearchHit.model_fields)
+FIELDS_DESCRIPTION = fields_description(PRODUCT_FIELDS)
+
+def _bulk_response(results: List[dict]) -> BulkResponse:
+    failed = sum(1 for result in results if result["status"] in ("error", "not_found"))
+    return BulkResponse(succeeded=len(results) - failed, failed=failed, results=results)
+
+def _check_bulk_size(items: list):
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many items. Maximum is {MAX_BULK_ITEMS} per request"
+        )
 
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_new_product(product: ProductCreate):
@@ -33,49 +60,112 @@ async def create_new_product(product: ProductCreate):
         updated_at=created_product.updated_at
     )
 
+@router.post("/bulk", response_model=BulkResponse, summary="Create Products In Bulk")
+async def create_products_bulk(products: List[ProductCreate]):
+    _check_bulk_size(products)
+    return _bulk_response(await bulk_create_products(products))
+
+@router.put("/bulk", response_model=BulkResponse, summary="Update Products In Bulk")
+async def update_products_bulk(items: List[ProductBulkUpdateItem]):
+    _check_bulk_size(items)
+    return _bulk_response(await bulk_update_products(items))
+
+@router.delete("/bulk", response_model=BulkResponse, summary="Delete Products In Bulk")
+async def delete_products_bulk(product_ids: List[str] = Body(..., description="Product ids to delete")):
+    _check_bulk_size(product_ids)
+    return _bulk_response(await bulk_delete_products(product_ids))
+
 @router.get(
     "/", 
-    response_model=List[ProductResponse],
+    response_model=Union[List[ProductResponse], ProductPage],
     summary="Get All Products"
 )
-async def get_all_products():
-    products = await get_products()
-    return [
-        ProductResponse(
-            id=str(product.id),
-            name=product.name,
-            description=product.description,
-            price=product.price,
-            category=product.category,
-            stock=product.stock,
-            status=product.status,
-            image_url=product.image_url,
-            created_at=product.created_at,
-            updated_at=product.updated_at
+async def get_all_products(
+    request: Request,
+    category: Optional[str] = Query(None, description="Only products in this category"),
+    product_status: Optional[str] = Query(None, alias="status", description="Only products with this status"),
+    min_price: Optional[float] = Query(None, ge=0, description="Minimum price (inclusive)"),
+    max_price: Optional[float] = Query(None, ge=0, description="Maximum price (inclusive)"),
+    in_stock: Optional[bool] = Query(None, description="true: stock > 0, false: out of stock"),
+    sort: str = Query("created_at", pattern="^(price|created_at|stock)$", description="price, created_at or stock"),
+    order: str = Query("desc", pattern="^(asc|desc)$", description="asc or desc"),
+    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+):
+    selected = selected_fields(fields, PRODUCT_FIELDS)
+    try:
+        docs = await get_product_listing(
+            category, product_status, min_price, max_price, in_stock,
+            sort, order, skip, limit, cursor, response_projection(selected)
         )
-        for product in products
-    ]
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    # Last-Modified tidak dipakai untuk list: produk yang dihapus tidak mengubahnya
+    etag = collection_etag(docs, variant=",".join(selected or []))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    items = to_response_list(docs, selected or PRODUCT_FIELDS)
+    if cursor is None:
+        return set_validators(FastJSONResponse(items), etag)
+    page = {"items": items, "next_cursor": next_product_cursor(docs, sort, order, limit)}
+    return set_validators(FastJSONResponse(page), etag)
+
+@router.get("/top", response_model=List[ProductResponse], summary="Get Top Products")
+async def read_top_products(
+    by: str = Query("price", pattern="^(price|created_at|stock)$", description="price, created_at or stock"),
+    limit: int = Query(5, ge=1, le=100, description="Number of products to return"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+):
+    selected = selected_fields(fields, PRODUCT_FIELDS)
+    docs = await get_top_product_docs(by, limit, response_projection(selected))
+    return FastJSONResponse(to_response_list(docs, selected or PRODUCT_FIELDS))
+
+@router.get("/search", response_model=ProductSearchResponse, summary="Search Products")
+async def search_all_products(
+    q: str = Query(..., min_length=1, max_length=200, description="Search text; words match name/description by prefix"),
+    category: Optional[str] = Query(None, description="Only products in this category"),
+    skip: int = Query(0, ge=0, le=1000, description="Number of results to skip"),
+    limit: int = Query(20, ge=1, le=100, description="Number of results to return")
+):
+    try:
+        result = await search_products(q, category, skip, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    result["results"] = to_response_list(result["results"], SEARCH_HIT_FIELDS)
+    return FastJSONResponse(result)
+
+@router.get("/export", summary="Export Products")
+async def export_products(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    fields: Optional[str] = Query(None, description="Comma separated fields to include"),
+    category: Optional[str] = Query(None, description="Only products in this category"),
+    start: Optional[datetime] = Query(None, description="Only products created at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only products created before this time"),
+    batch_size: int = Query(1000, ge=1, le=10000, description="Documents fetched from Mongo per batch")
+):
+    selected = selected_fields(fields, PRODUCT_FIELDS)
+    cursor = iter_products(category, start, end, fields_projection(selected), batch_size)
+    return export_response(cursor, selected or PRODUCT_FIELDS, format, "products")
 
 @router.get("/{product_id}", response_model=ProductResponse)
-async def read_product(product_id: str):
-    product = await get_product(product_id)
-    if not product:
+async def read_product(
+    product_id: str,
+    request: Request,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+):
+    selected = selected_fields(fields, PRODUCT_FIELDS)
+    doc = await get_product_doc(product_id, response_projection(selected))
+    if not doc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
-    return ProductResponse(
-        id=str(product.id), 
-        name=product.name,
-        description=product.description,
-        price=product.price,
-        category=product.category,
-        stock=product.stock,
-        status=product.status,
-        image_url=product.image_url,
-        created_at=product.created_at,
-        updated_at=product.updated_at
-    )
+    etag = resource_etag(doc, variant=",".join(selected or []))
+    if is_not_modified(request, etag, doc["updated_at"]):
+        return not_modified_response(etag, doc["updated_at"])
+    return set_validators(FastJSONResponse(to_response(doc, selected or PRODUCT_FIELDS)), etag, doc["updated_at"])
 
 @router.put(
     "/{product_id}", 
@@ -1,20 +1,76 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, status
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from app.utils.image_variants import variant_cache
+from app.crud.upload import add_upload_reference, release_upload_reference, upload_reference_count
+import hashlib
+import logging
 import os
-import shutil
-import uuid
+import tempfile
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/v1/upload", tags=["upload"])
 
 # Konfigurasi upload
 UPLOAD_DIR = "uploads"
 ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png'}  
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+CHUNK_SIZE = 256 * 1024
 
 
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+
+class FileTooLarge(Exception):
+    pass
+
+
+def _save_upload(source):
+    """
+    Copy the upload to a temp file in UPLOAD_DIR chunk by chunk, hashing it on the
+    way and stopping as soon as MAX_FILE_SIZE is exceeded. Returns (temp path,
+    size, sha256 hex). Runs in a worker thread so disk writes never block the
+    event loop.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, prefix=".upload-")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    raise FileTooLarge()
+                digest.update(chunk)
+                buffer.write(chunk)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path, size, digest.hexdigest()
+
+def _commit_upload(tmp_path: str, file_path: str, is_new: bool):
+    # Isi yang sama sudah tersimpan: temp file cukup dibuang
+    if not is_new and os.path.exists(file_path):
+        os.unlink(tmp_path)
+    else:
+        os.replace(tmp_path, file_path)
+
+def _tombstone(file_path: str) -> str:
+    """Move a file that lost its last reference out of the way; returns the new (hidden) path."""
+    fd, tombstone_path = tempfile.mkstemp(dir=UPLOAD_DIR, prefix=".deleted-")
+    os.close(fd)
+    try:
+        os.replace(file_path, tombstone_path)
+    except FileNotFoundError:
+        os.unlink(tombstone_path)
+        raise
+    return tombstone_path
+
 @router.post("/image")
 async def upload_image(
     file: UploadFile = File(...)
@@ -27,26 +83,37 @@ async def upload_image(
             detail="File type not allowed. Only JPG, JPEG, PNG are allowed."
         )
     
-    # Validasi ukuran file
-    file.file.seek(0, 2)
-    file_size = file.file.tell()
-    file.file.seek(0)
-    
-    if file_size > MAX_FILE_SIZE:
+    # Simpan file (ukuran divalidasi dan hash dihitung sambil menyalin, di thread pool)
+    try:
+        tmp_path, file_size, digest = await run_in_threadpool(_save_upload, file.file)
+    except FileTooLarge:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="File too large. Maximum size is 5MB"
         )
-    
-    # Generate nama file unik
-    unique_filename = f"{uuid.uuid4().hex}{file_extension}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
-    
-    # Simpan file
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error saving file: {str(e)}"
+        )
+
+    # Nama file diambil dari hash isi, jadi upload duplikat memakai file yang sama
+    upload_doc = None
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        upload_doc = await add_upload_reference(digest, f"{digest}{file_extension}", file_size)
+        unique_filename = upload_doc["filename"]
+        is_new = upload_doc["refcount"] == 1
+        await run_in_threadpool(_commit_upload, tmp_path, os.path.join(UPLOAD_DIR, unique_filename), is_new)
     except Exception as e:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        if upload_doc is not None:
+            # Referensi yang sudah dihitung dilepas lagi; untuk upload pertama dokumennya
+            # ikut terhapus, jadi tidak tersisa refcount tanpa file di disk
+            try:
+                await release_upload_reference(upload_doc["filename"])
+            except Exception:
+                logger.exception("Could not release upload reference for %s", upload_doc["filename"])
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error saving file: {str(e)}"
@@ -63,6 +130,7 @@ async def upload_image(
             "filename": unique_filename,
             "original_filename": file.filename,
             "file_size": file_size,
+            "deduplicated": not is_new,
             "uploaded_at": datetime.utcnow().isoformat()
         }
     )
@@ -79,18 +147,46 @@ async def delete_image(
         filename = image_url.split("/")[-1]
         file_path = os.path.join(UPLOAD_DIR, filename)
         
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            return {
-                "message": "Image deleted successfully",
-                "deleted_image": filename
-            }
-        else:
+        if not os.path.exists(file_path):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Image not found"
             )
-            
+
+        # File baru dihapus dari disk saat referensi terakhirnya dilepas
+        remaining = await release_upload_reference(filename)
+        if remaining:
+            return {
+                "message": "Image reference released",
+                "deleted_image": filename,
+                "remaining_references": remaining
+            }
+
+        # Upload ulang dengan isi yang sama bisa masuk di antara dilepasnya referensi dan
+        # penghapusan ini. File dipindah dulu, lalu baru dibuang kalau memang tidak ada
+        # referensi baru; kalau ada, dikembalikan (nama dari hash, jadi isinya sama)
+        try:
+            tombstone_path = await run_in_threadpool(_tombstone, file_path)
+        except FileNotFoundError:
+            tombstone_path = None
+        if tombstone_path is not None:
+            remaining = await upload_reference_count(filename)
+            if remaining:
+                await run_in_threadpool(os.replace, tombstone_path, file_path)
+                return {
+                    "message": "Image reference released",
+                    "deleted_image": filename,
+                    "remaining_references": remaining
+                }
+            await run_in_threadpool(os.unlink, tombstone_path)
+        await variant_cache.forget(filename)
+        return {
+            "message": "Image deleted successfully",
+            "deleted_image": filename
+        }
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,12 +1,20 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Request, Query
+from typing import List, Optional
 from app.crud.user import (
-    create_user, get_users, get_user, update_user, delete_user, get_user_by_email
+    create_user, get_user_docs, get_user_doc, update_user, delete_user, get_user_by_email
 )
 from app.schemas.user import UserCreate, UserUpdate, UserResponse
+from app.utils.etag_utils import (
+    resource_etag, collection_etag, is_not_modified, set_validators, not_modified_response
+)
+from app.utils.serialization import FastJSONResponse, to_response, to_response_list, response_projection
+from app.utils.query_params import fields_description, selected_fields
 
 router = APIRouter(prefix="/api/v1/users", tags=["Users"])
 
+USER_FIELDS = list(UserResponse.model_fields)
+FIELDS_DESCRIPTION = fields_description(USER_FIELDS)
+
 @router.post(
     "/", 
     response_model=UserResponse, 
@@ -41,45 +49,38 @@ async def create_new_user(user: UserCreate):
     summary="Get All Users",
    
 )
-async def get_all_users():
-    users = await get_users()
-    return [
-        UserResponse(
-            id=str(user.id),
-            email=user.email,
-            full_name=user.full_name,
-            role=user.role,
-            is_active=user.is_active,
-            phone=user.phone,
-            profile_picture=user.profile_picture,
-            created_at=user.created_at,
-            updated_at=user.updated_at
-        ) for user in users
-    ]
+async def get_all_users(
+    request: Request,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+):
+    selected = selected_fields(fields, USER_FIELDS)
+    docs = await get_user_docs(projection=response_projection(selected))
+    etag = collection_etag(docs, variant=",".join(selected or []))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    return set_validators(FastJSONResponse(to_response_list(docs, selected or USER_FIELDS)), etag)
 
 @router.get(
     "/{user_id}", 
     response_model=UserResponse,
     summary="Get One User",
 )
-async def get_single_user(user_id: str):
-    user = await get_user(user_id)
-    if not user:
+async def get_single_user(
+    user_id: str,
+    request: Request,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+):
+    selected = selected_fields(fields, USER_FIELDS)
+    doc = await get_user_doc(user_id, response_projection(selected))
+    if not doc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    return UserResponse(
-        id=str(user.id),
-        email=user.email,
-        full_name=user.full_name,
-        role=user.role, 
-        is_active=user.is_active,
-        phone=user.phone,
-        profile_picture=user.profile_picture,
-        created_at=user.created_at,
-        updated_at=user.updated_at
-    )
+    etag = resource_etag(doc, variant=",".join(selected or []))
+    if is_not_modified(request, etag, doc["updated_at"]):
+        return not_modified_response(etag, doc["updated_at"])
+    return set_validators(FastJSONResponse(to_response(doc, selected or USER_FIELDS)), etag, doc["updated_at"])
 
 @router.put(
     "/{user_id}", 
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class ActivityLogBase(BaseModel):
@@ -19,9 +19,19 @@ class ActivityLogResponse(ActivityLogBase):
     class Config:
         from_attributes = True
 
+class ActivityLogPage(BaseModel):
+    items: List[ActivityLogResponse]
+    next_cursor: Optional[str] = None
+
 class TopActivityResponse(BaseModel):
     action: str
     count: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ActivityStatsBucket(BaseModel):
+    bucket: datetime
+    action: str
+    resource: str
+    count: int
@@ -0,0 +1,30 @@
+from pydantic import BaseModel, Field
+from typing import List
+from datetime import datetime
+
+# Batas item per order, supaya satu checkout tidak menahan stok terlalu banyak produk
+MAX_ORDER_ITEMS = 50
+
+class OrderItemCreate(BaseModel):
+    product_id: str
+    quantity: int = Field(..., gt=0, le=1000)
+
+class OrderCreate(BaseModel):
+    items: List[OrderItemCreate] = Field(..., min_length=1, max_length=MAX_ORDER_ITEMS)
+
+class OrderItemResponse(BaseModel):
+    product_id: str
+    quantity: int
+    price: float
+
+class OrderResponse(BaseModel):
+    id: str
+    user_id: str
+    items: List[OrderItemResponse]
+    total_amount: float
+    status: str
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, field_validator
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class ProductCreate(BaseModel):
@@ -39,4 +39,41 @@ class ProductResponse(BaseModel):
     updated_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ProductPage(BaseModel):
+    items: List[ProductResponse]
+    next_cursor: Optional[str] = None
+
+class ProductBulkUpdateItem(ProductUpdate):
+    id: str
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    status: str  # created, updated, deleted, not_found, error
+    error: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+class ProductSearchHit(ProductResponse):
+    score: float
+
+class CategoryFacet(BaseModel):
+    category: str
+    count: int
+
+class PriceBandFacet(BaseModel):
+    min: float
+    max: Optional[float] = None  # None: band terakhir tanpa batas atas
+    count: int
+
+class ProductSearchResponse(BaseModel):
+    results: List[ProductSearchHit]
+    total: int
+    truncated: bool
+    categories: List[CategoryFacet]
+    price_bands: List[PriceBandFacet]
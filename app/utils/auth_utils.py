@@ -1,5 +1,9 @@
 import jwt
+import time
 from datetime import datetime, timedelta
+from typing import Optional
+from app.config import settings
+from app.utils.cache import LRUCache
 
 SECRET_KEY = "SECRET_JWT_KEY_GANTI_INI"
 ALGORITHM = "HS256"
@@ -10,3 +14,23 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+def decode_access_token(token: str) -> dict:
+    """Verify signature and expiry; raises jwt.InvalidTokenError on a bad token."""
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+# Token yang sudah diverifikasi -> User. Entry hidup sampai exp token, dibatasi
+# PRINCIPAL_CACHE_MAX_TTL supaya worker lain tidak memakai data user yang basi terlalu lama.
+PRINCIPAL_CACHE_MAX_TTL = settings.principal_cache_max_ttl
+principal_cache = LRUCache(max_entries=settings.principal_cache_max_entries)
+
+def cache_principal(token: str, principal, exp: float):
+    ttl = min(exp - time.time(), PRINCIPAL_CACHE_MAX_TTL)
+    if ttl > 0:
+        principal_cache.set(token, principal, ttl=ttl)
+
+def get_cached_principal(token: str) -> Optional[object]:
+    return principal_cache.get(token)
+
+def invalidate_principal(user_id: str):
+    principal_cache.delete_where(lambda principal: str(principal.id) == user_id)
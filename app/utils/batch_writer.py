@@ -0,0 +1,178 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class BatchWriter:
+    """
+    Bounded in-process queue that groups documents into insert_many(ordered=False)
+    calls. A batch is flushed once max_batch_size documents are queued or
+    flush_interval seconds after its first document, whichever comes first.
+
+    When the queue is full, write() waits (backpressure). When the writer is not
+    running (before startup, after shutdown, in scripts) documents are inserted
+    directly so nothing is dropped.
+    """
+
+    def __init__(
+        self,
+        collection,
+        max_batch_size: int = 500,
+        flush_interval: float = 0.05,
+        max_queue_size: int = 10000,
+    ):
+        self.collection = collection
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self._flush_hooks: List[Callable[[List[dict]], Awaitable[None]]] = []
+        self._queue: Optional[asyncio.Queue] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # Hanya diubah di event loop
+        self.batches = 0
+        self.written = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def stats(self) -> dict:
+        return {"pending": self.pending, "batches": self.batches, "written": self.written, "failed": self.failed}
+
+    def add_flush_hook(self, hook: Callable[[List[dict]], Awaitable[None]]):
+        """Register a coroutine that receives every batch of documents once it is stored."""
+        self._flush_hooks.append(hook)
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop accepting queued writes and flush everything already queued."""
+        if not self.running:
+            return
+        task = self._task
+        await self._queue.put((_STOP, None))
+        self._wakeup.set()
+        await task
+        self._task = None
+        # Writes that raced with stop() land behind the sentinel
+        leftover = []
+        while not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+        if leftover:
+            await self._flush(leftover)
+
+    async def write(self, doc: dict, wait: bool = False):
+        """
+        Queue a document. With wait=True, return only once it has been written
+        (re-raising the insert error, if any); otherwise return immediately.
+        """
+        if not self.running:
+            await self.collection.insert_one(doc)
+            await self._run_hooks([doc])
+            return
+        future = asyncio.get_running_loop().create_future() if wait else None
+        await self._queue.put((doc, future))
+        if self._queue.qsize() >= self.max_batch_size or self._queue.full():
+            self._wakeup.set()
+        if future is not None:
+            await future
+
+    async def write_many(self, docs: List[dict], wait: bool = False):
+        """Queue several documents at once; see write()."""
+        if not self.running:
+            if docs:
+                await self.collection.insert_many(docs, ordered=False)
+                await self._run_hooks(docs)
+            return
+        loop = asyncio.get_running_loop()
+        futures = []
+        for doc in docs:
+            future = loop.create_future() if wait else None
+            await self._queue.put((doc, future))
+            if future is not None:
+                futures.append(future)
+        self._wakeup.set()
+        if futures:
+            await asyncio.gather(*futures)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            batch = []
+            item = await self._queue.get()
+            deadline = loop.time() + self.flush_interval
+            while True:
+                if item[0] is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.max_batch_size:
+                    break
+                if self._queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+                    if self._queue.empty():
+                        break
+                item = self._queue.get_nowait()
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, batch: list):
+        docs = [doc for doc, _ in batch]
+        failed = {}
+        try:
+            await self.collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed[error["index"]] = e
+            logger.error("Batch insert into %s failed for %d of %d documents",
+                         self.collection.name, len(failed), len(docs))
+        except Exception as e:
+            failed = {i: e for i in range(len(batch))}
+            logger.exception("Batch insert into %s failed", self.collection.name)
+
+        for i, (_, future) in enumerate(batch):
+            if future is None or future.done():
+                continue
+            if i in failed:
+                future.set_exception(failed[i])
+            else:
+                future.set_result(None)
+
+        written = [doc for i, doc in enumerate(docs) if i not in failed]
+        self.batches += 1
+        self.written += len(written)
+        self.failed += len(failed)
+        if written:
+            await self._run_hooks(written)
+
+    async def _run_hooks(self, docs: List[dict]):
+        for hook in self._flush_hooks:
+            try:
+                await hook(docs)
+            except Exception:
+                logger.exception("Flush hook %s failed", getattr(hook, "__name__", hook))
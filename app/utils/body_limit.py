@@ -0,0 +1,73 @@
+from starlette.responses import JSONResponse
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class BodySizeLimitMiddleware:
+    """
+    Reject request bodies above max_body_size for paths under path_prefix while
+    they are still being received, before Starlette spools the whole multipart body
+    to disk. Uses Content-Length when present and counts streamed bytes otherwise
+    (chunked uploads); either way the client gets 413, whatever the route made of
+    the interrupted body.
+    """
+
+    def __init__(self, app, max_body_size: int, path_prefix: str = "/"):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_body_size:
+                await self._reject(scope, receive, send)
+                return
+
+        received = 0
+        too_large = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, too_large
+            if too_large:
+                raise _BodyTooLarge()
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    too_large = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if too_large:
+                # Form parser FastAPI menelan _BodyTooLarge dan menjawab 400; respons
+                # apa pun dari app setelah body kebesaran diganti dengan 413 di sini
+                if not response_started:
+                    response_started = True
+                    await self._reject(scope, receive, send)
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            pass
+        if too_large and not response_started:
+            await self._reject(scope, receive, send)
+
+    async def _reject(self, scope, receive, send):
+        response = JSONResponse(
+            status_code=413,
+            content={"detail": f"Request body too large. Maximum size is {self.max_body_size} bytes"},
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,235 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional
+
+import bson
+
+from app.config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis hanya dibutuhkan kalau CACHE_REDIS_URL diisi
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Bounded in-process cache with per-entry TTL and least-recently-used eviction."""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str):
+        self._data.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[object], bool]):
+        """Drop every entry whose value matches predicate (O(n), for rare invalidations)."""
+        for key in [key for key, (_, value) in self._data.items() if predicate(value)]:
+            del self._data[key]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class RedisCache:
+    """Shared cache backend; documents are stored BSON-encoded so datetimes survive."""
+
+    def __init__(self, url: str, ttl: float = 60.0, prefix: str = "backend-st:"):
+        if aioredis is None:
+            raise RuntimeError("CACHE_REDIS_URL is set but the redis package is not installed")
+        self.client = aioredis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self.client.get(self.prefix + key)
+        return bson.decode(raw) if raw is not None else None
+
+    async def set(self, key: str, value: dict):
+        await self.client.set(self.prefix + key, bson.encode(value), px=int(self.ttl * 1000))
+
+    async def delete(self, *keys: str):
+        await self.client.delete(*[self.prefix + key for key in keys])
+
+    @property
+    def channel(self) -> str:
+        return self.prefix + "invalidate"
+
+    async def publish_invalidation(self, keys: List[str]):
+        await self.client.publish(self.channel, json.dumps(keys))
+
+    async def listen_invalidations(self, on_keys: Callable[[List[str]], None], on_reset: Callable[[], None]):
+        """
+        Call on_keys for every invalidation published by any worker. on_reset runs
+        after each (re)subscribe, because messages sent while disconnected are lost.
+        """
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                on_reset()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        on_keys(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Cache invalidation subscription failed; resubscribing")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+
+class ReadThroughCache:
+    """
+    Local LRU in front of an optional shared backend. Values are raw Mongo documents
+    and must be treated as read-only by callers. With a shared backend,
+    invalidations are published so every worker drops its local copy; without
+    one, other workers keep theirs until the local TTL runs out.
+    """
+
+    def __init__(self, local: LRUCache, shared: Optional[RedisCache] = None):
+        self.local = local
+        self.shared = shared
+        # Naik setiap invalidate; load yang mulai sebelum invalidate tidak boleh mengisi cache
+        self._generation = 0
+        self._listener: Optional[asyncio.Task] = None
+        # Error Redis tidak menggagalkan request; cache jatuh ke tier lokal dan database
+        self.shared_errors = 0
+
+    async def start(self):
+        """Subscribe to invalidations from other workers (only with a shared backend)."""
+        if self.shared is not None and self._listener is None:
+            self._listener = asyncio.create_task(self.shared.listen_invalidations(self._drop_local, self._reset_local))
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    def _drop_local(self, keys: List[str]):
+        self._generation += 1
+        for key in keys:
+            self.local.delete(key)
+
+    def _reset_local(self):
+        self._generation += 1
+        self.local.clear()
+
+    async def _shared_get(self, key: str) -> Optional[dict]:
+        try:
+            return await self.shared.get(key)
+        except Exception:
+            self.shared_errors += 1
+            logger.warning("Shared cache read failed for %s; loading from the database", key, exc_info=True)
+            return None
+
+    async def _shared_set(self, key: str, value: dict):
+        try:
+            await self.shared.set(key, value)
+        except Exception:
+            self.shared_errors += 1
+            logger.warning("Shared cache write failed for %s", key, exc_info=True)
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Optional[dict]]]) -> Optional[dict]:
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        generation = self._generation
+        if self.shared is not None:
+            value = await self._shared_get(key)
+            if value is not None:
+                if generation == self._generation:
+                    self.local.set(key, value)
+                return value
+        value = await loader()
+        if value is not None and generation == self._generation:
+            self.local.set(key, value)
+            if self.shared is not None:
+                await self._shared_set(key, value)
+        return value
+
+    def peek(self, key: str) -> Optional[dict]:
+        """Local entry only, never loads; for callers that have a cheaper fallback."""
+        return self.local.get(key)
+
+    async def invalidate(self, key: str):
+        await self.invalidate_many([key])
+
+    async def invalidate_many(self, keys: List[str]):
+        """
+        Never raises: it runs after a write that already succeeded. If Redis is
+        unreachable, the stale copies there and in other workers live at most
+        one TTL.
+        """
+        self._drop_local(keys)
+        if self.shared is not None and keys:
+            try:
+                await self.shared.delete(*keys)
+                # Worker lain membuang salinan lokalnya saat pesan ini diterima
+                await self.shared.publish_invalidation(keys)
+            except Exception:
+                self.shared_errors += 1
+                logger.error("Shared cache invalidation failed for %s", ", ".join(keys), exc_info=True)
+
+    def stats(self) -> dict:
+        stats = self.local.stats()
+        if self.shared is not None:
+            stats["shared_errors"] = self.shared_errors
+        return stats
+
+
+def _build_cache() -> ReadThroughCache:
+    ttl = settings.cache_ttl_seconds
+    local = LRUCache(max_entries=settings.cache_max_entries, ttl=ttl)
+    redis_url = settings.cache_redis_url
+    shared = RedisCache(redis_url, ttl=ttl) if redis_url else None
+    return ReadThroughCache(local, shared)
+
+
+cache = _build_cache()
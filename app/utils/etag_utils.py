@@ -0,0 +1,71 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional
+
+from fastapi import Request, Response, status
+
+
+def _version(doc: dict) -> str:
+    updated_at = doc.get("updated_at")
+    return f"{doc['_id']}:{updated_at.isoformat() if updated_at else ''}"
+
+
+def resource_etag(doc: dict, variant: str = "") -> str:
+    """
+    Strong ETag for one document; every write to products/users bumps updated_at.
+    variant separates representations of the same document (e.g. a sparse fieldset).
+    """
+    return '"' + hashlib.sha1(f"{variant}|{_version(doc)}".encode()).hexdigest() + '"'
+
+
+def collection_etag(docs: Iterable[dict], variant: str = "") -> str:
+    """
+    ETag for a list response, derived from the _id/updated_at of every document in
+    it (and their order), so inserts, updates and deletes all change it.
+    """
+    digest = hashlib.sha1(f"{variant}|".encode())
+    for doc in docs:
+        digest.update(_version(doc).encode())
+        digest.update(b"\n")
+    return '"' + digest.hexdigest() + '"'
+
+
+def _http_date(value: datetime) -> str:
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since for a GET. If-None-Match wins when
+    both are sent (RFC 9110 13.2.2); the weak comparison is used for it.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # Header HTTP hanya presisi detik
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
+
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime] = None) -> Response:
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = _http_date(last_modified)
+    return response
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    return set_validators(Response(status_code=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+from bson import ObjectId
+from fastapi.responses import StreamingResponse
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Ukuran chunk yang dikirim ke client, bukan ukuran batch cursor Mongo
+CHUNK_SIZE = 64 * 1024
+# Baris yang sudah ada tidak ditahan lebih lama dari ini (filter selektif = baris jarang)
+FLUSH_INTERVAL = 0.5
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    return str(value)
+
+
+def parse_fields(fields: Optional[str], allowed: List[str]) -> Optional[List[str]]:
+    """Parse a comma separated field list, raising ValueError on unknown fields."""
+    if not fields:
+        return None
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+
+def fields_projection(fields: Optional[List[str]]) -> Optional[dict]:
+    if not fields:
+        return None
+    projection = {f: 1 for f in fields if f != "id"}
+    if "id" not in fields:
+        projection["_id"] = 0
+    return projection
+
+
+def _row(doc: dict, fields: List[str]) -> dict:
+    if "_id" in doc:
+        doc["id"] = doc.pop("_id")
+    return {f: doc.get(f) for f in fields}
+
+
+async def _chunked(lines: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Group lines into chunks of about CHUNK_SIZE. The first line is sent on its
+    own, and a partial chunk is sent once FLUSH_INTERVAL has passed since the
+    previous one, so a slow scan still streams.
+    """
+    buffer = []
+    size = 0
+    first = True
+    last_flush = time.monotonic()
+    async for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if first or size >= CHUNK_SIZE or time.monotonic() - last_flush >= FLUSH_INTERVAL:
+            yield "".join(buffer)
+            buffer, size, first = [], 0, False
+            last_flush = time.monotonic()
+    if buffer:
+        yield "".join(buffer)
+
+
+async def _ndjson_lines(cursor, fields: List[str]) -> AsyncIterator[str]:
+    async for doc in cursor:
+        yield json.dumps(_row(doc, fields), default=_json_default) + "\n"
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def _csv_lines(cursor, fields: List[str]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # Header menjadi baris pertama, jadi langsung dikirim sebelum Mongo mengembalikan dokumen
+    writer.writerow(fields)
+    yield buffer.getvalue()
+    async for doc in cursor:
+        buffer.seek(0)
+        buffer.truncate()
+        row = _row(doc, fields)
+        writer.writerow([_csv_value(row[f]) for f in fields])
+        yield buffer.getvalue()
+
+
+def export_response(cursor, fields: List[str], export_format: str, filename: str) -> StreamingResponse:
+    """Stream a Motor cursor to the client as NDJSON or CSV without materializing it."""
+    lines = _csv_lines(cursor, fields) if export_format == "csv" else _ndjson_lines(cursor, fields)
+    return StreamingResponse(
+        _chunked(lines),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
@@ -0,0 +1,176 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from app.config import settings
+
+VARIANT_CACHE_DIR = settings.variant_cache_dir
+VARIANT_CACHE_MAX_BYTES = settings.variant_cache_max_mb * 1024 * 1024
+IMAGE_VARIANT_WORKERS = settings.image_variant_workers
+VARIANT_QUALITY = 80
+
+# Lebar diminta dibulatkan ke atas ke salah satu ukuran ini supaya cache tidak
+# dipenuhi varian untuk setiap lebar yang mungkin
+VARIANT_WIDTHS = [64, 128, 200, 320, 480, 640, 800, 1024, 1280, 1600, 2048]
+
+VARIANT_FORMATS = {
+    "webp": ("WEBP", "image/webp", ".webp"),
+    "jpeg": ("JPEG", "image/jpeg", ".jpg"),
+    "png": ("PNG", "image/png", ".png"),
+}
+
+
+def snap_width(width: int) -> int:
+    for candidate in VARIANT_WIDTHS:
+        if width <= candidate:
+            return candidate
+    return VARIANT_WIDTHS[-1]
+
+
+def _render_variant(source_path: str, dest_path: str, width: Optional[int], fmt: str) -> int:
+    """Resize/re-encode one image. Runs in a worker process, so it imports Pillow itself."""
+    from PIL import Image, ImageOps
+
+    pil_format = VARIANT_FORMATS[fmt][0]
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        if width and image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+        image.save(tmp_path, pil_format, quality=VARIANT_QUALITY, optimize=True)
+    os.replace(tmp_path, dest_path)
+    return os.path.getsize(dest_path)
+
+
+def _remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _touch(path: str) -> bool:
+    """Mark a variant as used (atime only, mtime stays for ETag). False if the file is gone."""
+    try:
+        stat = os.stat(path)
+        os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _scan(directory: str):
+    """(atime, path, size) of every finished variant in the directory, least recently used first."""
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".tmp"):
+            continue
+        try:
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_atime, entry.path, stat.st_size))
+        except FileNotFoundError:
+            # Baru saja dihapus worker lain
+            pass
+    entries.sort()
+    return entries
+
+
+def _evict(directory: str, max_bytes: int, keep: str) -> int:
+    """Delete least recently used variants until the directory fits in max_bytes; returns the size left."""
+    entries = _scan(directory)
+    size = sum(entry_size for _, _, entry_size in entries)
+    evicted = []
+    for _, path, entry_size in entries:
+        if size <= max_bytes:
+            break
+        if path == keep:
+            continue
+        evicted.append(path)
+        size -= entry_size
+    _remove_files(evicted)
+    return size
+
+
+def _remove_variants(directory: str, prefix: str):
+    _remove_files([path for _, path, _ in _scan(directory) if path.startswith(prefix)])
+
+
+class VariantCache:
+    """
+    On-disk cache of derived images, bounded by total size with least-recently-used
+    eviction. Variants are rendered in a process pool and concurrent requests for
+    the same variant share one render.
+
+    Every app worker shares the directory, so the directory itself is the index:
+    a hit is a file that still exists, recency is the file's atime and the size
+    bound is checked against a fresh scan after each render.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, workers: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def _ensure_ready(self):
+        if self._executor is not None:
+            return
+        await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(os.makedirs, self.directory, exist_ok=True)
+        )
+        if self._executor is None:
+            # spawn: jangan fork proses yang sedang menjalankan event loop dan thread Motor
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+    def variant_path(self, filename: str, width: Optional[int], fmt: str) -> str:
+        stem = os.path.splitext(filename)[0]
+        suffix = f".w{width}" if width else ""
+        return os.path.join(self.directory, f"{stem}{suffix}{VARIANT_FORMATS[fmt][2]}")
+
+    async def get(self, source_path: str, filename: str, width: Optional[int], fmt: str) -> str:
+        """Return the path of the variant, rendering it first if it is not cached."""
+        await self._ensure_ready()
+        path = self.variant_path(filename, width, fmt)
+        # Cek file-nya langsung: worker lain bisa sudah me-render atau justru menghapusnya
+        if _touch(path):
+            return path
+
+        future = self._inflight.get(path)
+        if future is None:
+            future = asyncio.ensure_future(self._render(source_path, path, width, fmt))
+            self._inflight[path] = future
+            future.add_done_callback(lambda _: self._inflight.pop(path, None))
+        await asyncio.shield(future)
+        return path
+
+    async def _render(self, source_path: str, path: str, width: Optional[int], fmt: str):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, _render_variant, source_path, path, width, fmt)
+        # Batas ukuran dihitung dari isi direktori, termasuk varian dari worker lain
+        await loop.run_in_executor(None, _evict, self.directory, self.max_bytes, path)
+
+    async def forget(self, filename: str):
+        """Drop every cached variant of an original that is being deleted."""
+        prefix = os.path.join(self.directory, os.path.splitext(filename)[0]) + "."
+        if os.path.isdir(self.directory):
+            await asyncio.get_running_loop().run_in_executor(None, _remove_variants, self.directory, prefix)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+variant_cache = VariantCache(VARIANT_CACHE_DIR, VARIANT_CACHE_MAX_BYTES, IMAGE_VARIANT_WORKERS)
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Opsi index yang dibandingkan saat mencari drift
+_COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds", "collation")
+
+
+def _normalize_options(spec: dict) -> dict:
+    options = {}
+    for option in _COMPARED_OPTIONS:
+        value = spec.get(option)
+        if option in ("unique", "sparse"):
+            value = bool(value)
+        elif option == "collation" and value:
+            # Server mengisi semua default collation; yang dibandingkan hanya yang dideklarasikan
+            value = dict(value)
+        if value not in (None, False):
+            options[option] = value
+    return options
+
+
+def _options_match(declared: dict, existing: dict) -> bool:
+    declared_options = _normalize_options(declared)
+    existing_options = _normalize_options(existing)
+    if "collation" in declared_options:
+        wanted = declared_options.pop("collation")
+        actual = existing_options.pop("collation", {})
+        if any(actual.get(key) != value for key, value in wanted.items()):
+            return False
+    else:
+        existing_options.pop("collation", None)
+    return declared_options == existing_options
+
+
+class IndexRegistry:
+    """
+    Indexes declared next to the crud code that needs them, plus sample queries
+    whose plans can be checked. reconcile() creates what is missing and reports
+    drift; it never drops or rebuilds an index, that stays a deliberate operation.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[str, Tuple[object, List[IndexModel]]] = {}
+        self._queries: List[dict] = []
+        self._external: Dict[str, set] = {}
+
+    def register(self, collection, *indexes: IndexModel):
+        _, models = self._indexes.setdefault(collection.name, (collection, []))
+        models.extend(indexes)
+
+    def register_external(self, collection, *names: str):
+        """Indexes created and dropped by other code; reconcile() neither creates nor reports them."""
+        self._external.setdefault(collection.name, set()).update(names)
+
+    def register_query(
+        self,
+        name: str,
+        collection,
+        query: dict,
+        sort: Optional[Sequence[Tuple[str, int]]] = None
+    ):
+        """Declare a representative query for plan checks (manage.py check-plans)."""
+        self._queries.append({"name": name, "collection": collection, "filter": query, "sort": sort})
+
+    @property
+    def queries(self) -> List[dict]:
+        return list(self._queries)
+
+    async def _reconcile_collection(self, collection, models: List[IndexModel]) -> dict:
+        report = {"created": [], "drift": [], "failed": [], "undeclared": []}
+        existing = await collection.index_information()
+        missing = []
+        for model in models:
+            spec = model.document
+            current = existing.get(spec["name"])
+            if current is None:
+                missing.append(model)
+            elif list(current["key"]) != list(spec["key"].items()) or not _options_match(spec, current):
+                report["drift"].append(spec["name"])
+
+        # Satu perintah createIndexes per collection; kalau gagal, coba satu per satu
+        # supaya satu index bermasalah (mis. duplikat pada unique) tidak menahan yang lain
+        if missing:
+            try:
+                await collection.create_indexes(missing)
+                report["created"] = [model.document["name"] for model in missing]
+            except OperationFailure:
+                for model in missing:
+                    try:
+                        await collection.create_indexes([model])
+                        report["created"].append(model.document["name"])
+                    except OperationFailure as e:
+                        report["failed"].append(f"{model.document['name']}: {e}")
+
+        declared = {model.document["name"] for model in models} | self._external.get(collection.name, set())
+        report["undeclared"] = [name for name in existing if name != "_id_" and name not in declared]
+        return report
+
+    async def reconcile(self) -> Dict[str, dict]:
+        """Create missing indexes on every registered collection concurrently; returns a report per collection."""
+        names = list(self._indexes)
+        reports = await asyncio.gather(*[
+            self._reconcile_collection(*self._indexes[name]) for name in names
+        ])
+        result = dict(zip(names, reports))
+        for name, report in result.items():
+            if report["created"]:
+                logger.info("Created indexes on %s: %s", name, ", ".join(report["created"]))
+            if report["drift"]:
+                logger.warning("Index drift on %s (options or keys differ): %s", name, ", ".join(report["drift"]))
+            if report["failed"]:
+                logger.error("Could not create indexes on %s: %s", name, "; ".join(report["failed"]))
+            if report["undeclared"]:
+                logger.warning("Undeclared indexes on %s: %s", name, ", ".join(report["undeclared"]))
+        return result
+
+
+index_registry = IndexRegistry()
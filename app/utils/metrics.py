@@ -0,0 +1,215 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import monitoring
+
+# Batas bucket (detik) untuk latency HTTP dan perintah Mongo
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class _Sharded:
+    """
+    One dict per recording thread, merged only when metrics are scraped. Recording
+    never takes a lock: each thread only touches its own shard (the event loop
+    thread for HTTP, driver threads for Mongo events). The lock is taken once per
+    new thread and on scrape.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _snapshots(self) -> List[list]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        # list(dict.items()) disalin tanpa melepas GIL, aman walau thread lain menambah key
+        return [list(shard.items()) for shard in shards]
+
+
+class Counter(_Sharded):
+    def inc(self, labels: tuple = (), amount: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def collect(self) -> Dict[tuple, float]:
+        totals: Dict[tuple, float] = {}
+        for items in self._snapshots():
+            for labels, value in items:
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+
+class Histogram(_Sharded):
+    def __init__(self, buckets: Iterable[float]):
+        super().__init__()
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels: tuple, value: float):
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            # [count per bucket..., +Inf], sum
+            state = shard[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def collect(self) -> Dict[tuple, Tuple[List[int], float]]:
+        totals: Dict[tuple, Tuple[List[int], float]] = {}
+        for items in self._snapshots():
+            for labels, (counts, total) in items:
+                merged = totals.setdefault(labels, ([0] * len(counts), 0.0))
+                totals[labels] = ([a + b for a, b in zip(merged[0], counts)], merged[1] + total)
+        return totals
+
+
+# Metrik yang dicatat aplikasi
+http_request_duration = Histogram(LATENCY_BUCKETS)
+http_response_size = Histogram(SIZE_BUCKETS)
+http_requests_in_flight = Counter()
+mongo_command_duration = Histogram(LATENCY_BUCKETS)
+mongo_command_failures = Counter()
+mongo_pool_wait = Histogram(LATENCY_BUCKETS)
+
+
+def _route_label(scope: dict) -> str:
+    # Template route (/api/v1/products/{product_id}), bukan path asli, supaya label tidak meledak
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" in scope:
+        return f"{scope.get('root_path', '')}/*"
+    return "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, response size and in-flight requests per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        started = time.perf_counter()
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_flight.inc((method,), 1)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.inc((method,), -1)
+            route = _route_label(scope)
+            http_request_duration.observe((method, route, str(status_code)), time.perf_counter() - started)
+            http_response_size.observe((method, route), size)
+
+
+def command_collection(command_name: str, command) -> Optional[str]:
+    """Collection a driver command targets; getMore names the cursor id first, the collection separately."""
+    target = command.get("collection") if command_name == "getMore" else command.get(command_name)
+    return target if isinstance(target, str) else None
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Per collection and command durations from the driver's command monitoring events."""
+
+    def __init__(self):
+        # (connection_id, request_id) -> collection; dict get/pop atomik di bawah GIL
+        self._collections: Dict[tuple, str] = {}
+
+    def started(self, event):
+        collection = command_collection(event.command_name, event.command) or ""
+        self._collections[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event, outcome: str):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        labels = (event.command_name, collection, outcome)
+        mongo_command_duration.observe(labels, event.duration_micros / 1_000_000)
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+        mongo_command_failures.inc((event.command_name,))
+
+
+command_metrics = CommandMetrics()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _render_histogram(lines: List[str], name: str, help_text: str, histogram: Histogram, label_names: Tuple[str, ...]):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for labels, (counts, total) in sorted(histogram.collect().items()):
+        cumulative = 0
+        for bound, count in zip(list(histogram.buckets) + ["+Inf"], counts):
+            cumulative += count
+            le = 'le="%s"' % bound
+            lines.append(f"{name}_bucket{_labels(label_names, labels, le)} {cumulative}")
+        lines.append(f"{name}_sum{_labels(label_names, labels)} {total}")
+        lines.append(f"{name}_count{_labels(label_names, labels)} {cumulative}")
+
+
+def _render_samples(lines: List[str], name: str, kind: str, help_text: str, samples: Dict[tuple, float], label_names: Tuple[str, ...] = ()):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in sorted(samples.items()):
+        lines.append(f"{name}{_labels(label_names, labels)} {value}")
+
+
+def render_metrics(extra: Optional[Dict[str, Tuple[str, str, float]]] = None) -> str:
+    """
+    Prometheus text exposition (format 0.0.4) of everything recorded here, plus
+    extra samples given as {name: (type, help, value)} for stats owned by other
+    modules (cache, batch writer, pool).
+    """
+    lines: List[str] = []
+    _render_histogram(lines, "http_request_duration_seconds", "HTTP request latency by route",
+                      http_request_duration, ("method", "route", "status"))
+    _render_histogram(lines, "http_response_size_bytes", "HTTP response body size by route",
+                      http_response_size, ("method", "route"))
+    _render_samples(lines, "http_requests_in_flight", "gauge", "HTTP requests being handled",
+                    http_requests_in_flight.collect(), ("method",))
+    _render_histogram(lines, "mongodb_command_duration_seconds", "MongoDB command latency by collection",
+                      mongo_command_duration, ("command", "collection", "outcome"))
+    _render_samples(lines, "mongodb_command_failures_total", "counter", "Failed MongoDB commands",
+                    mongo_command_failures.collect(), ("command",))
+    _render_histogram(lines, "mongodb_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+                      mongo_pool_wait, ())
+    for name, (kind, help_text, value) in (extra or {}).items():
+        _render_samples(lines, name, kind, help_text, {(): value})
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,42 @@
+import asyncio
+import hmac
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.config import settings
+
+BCRYPT_ROUNDS = settings.bcrypt_rounds
+PASSWORD_HASH_WORKERS = settings.password_hash_workers
+
+# min/max sama dengan default, jadi hash dengan cost lama dianggap perlu di-update
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+# bcrypt melepas GIL, jadi thread pool kecil cukup tanpa memblokir event loop.
+# Ukurannya dibatasi supaya lonjakan login tidak menghabiskan semua CPU worker.
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+async def hash_password(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, pwd_context.hash, password)
+
+
+async def verify_password(password: str, stored: str) -> Tuple[bool, Optional[str]]:
+    """
+    Check a password against the stored value. Returns (valid, new_hash) where
+    new_hash is set when the stored value should be replaced: it is a legacy
+    plaintext password or was hashed with a different cost.
+    """
+    if pwd_context.identify(stored) is None:
+        if hmac.compare_digest(password.encode(), stored.encode()):
+            return True, await hash_password(password)
+        return False, None
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, pwd_context.verify_and_update, password, stored)
@@ -0,0 +1,67 @@
+from pymongo import monitoring
+
+from app.utils.metrics import Counter, mongo_pool_wait
+
+_STATS = (
+    "open", "in_use", "created", "closed", "checkouts",
+    "checkout_failures", "checkout_wait_seconds", "pool_clears",
+)
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Connection pool counters for every server the client talks to. Events arrive
+    on driver threads; the sharded counters keep recording lock-free.
+    """
+
+    def __init__(self):
+        self._counters = Counter()
+
+    def stats(self) -> dict:
+        totals = self._counters.collect()
+        stats = {name: totals.get((name,), 0) for name in _STATS}
+        stats["checkout_wait_seconds"] = round(stats["checkout_wait_seconds"], 6)
+        return stats
+
+    def connection_created(self, event):
+        self._counters.inc(("open",))
+        self._counters.inc(("created",))
+
+    def connection_closed(self, event):
+        self._counters.inc(("open",), -1)
+        self._counters.inc(("closed",))
+
+    def connection_checked_out(self, event):
+        # duration: waktu tunggu sampai dapat koneksi (pymongo >= 4.7)
+        wait = getattr(event, "duration", 0.0) or 0.0
+        self._counters.inc(("in_use",))
+        self._counters.inc(("checkouts",))
+        self._counters.inc(("checkout_wait_seconds",), wait)
+        mongo_pool_wait.observe((), wait)
+
+    def connection_checked_in(self, event):
+        self._counters.inc(("in_use",), -1)
+
+    def connection_check_out_failed(self, event):
+        self._counters.inc(("checkout_failures",))
+
+    def pool_cleared(self, event):
+        self._counters.inc(("pool_clears",))
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+
+pool_metrics = PoolMetrics()
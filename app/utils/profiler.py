@@ -0,0 +1,134 @@
+import cProfile
+import io
+import marshal
+import pstats
+import random
+import secrets
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from app.config import settings
+
+PROFILE_HEADER = b"x-profile"
+
+
+class ProfileStore:
+    """The last max_entries request profiles, kept in memory for download."""
+
+    def __init__(self, max_entries: int = 20):
+        self.max_entries = max_entries
+        self._profiles: "OrderedDict[str, dict]" = OrderedDict()
+
+    def add(self, entry: dict):
+        self._profiles[entry["id"]] = entry
+        while len(self._profiles) > self.max_entries:
+            self._profiles.popitem(last=False)
+
+    def list(self) -> List[dict]:
+        # Terbaru dulu, tanpa isi profilnya
+        return [
+            {key: value for key, value in entry.items() if key != "stats"}
+            for entry in reversed(self._profiles.values())
+        ]
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        return self._profiles.get(profile_id)
+
+    def summary(self, profile_id: str, sort: str = "cumulative", limit: int = 50) -> Optional[str]:
+        entry = self.get(profile_id)
+        if entry is None:
+            return None
+        stream = io.StringIO()
+        stats = pstats.Stats(_StatsHolder(entry["stats"]), stream=stream)
+        stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def dump(self, profile_id: str) -> Optional[bytes]:
+        """The profile in the pstats file format (what Profile.dump_stats writes), for snakeviz and friends."""
+        entry = self.get(profile_id)
+        return marshal.dumps(entry["stats"]) if entry is not None else None
+
+
+class _StatsHolder:
+    # pstats.Stats menerima objek apa pun yang punya create_stats() dan .stats
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class ProfilerMiddleware:
+    """
+    Runs cProfile around a request when it carries "X-Profile: <debug token>" or
+    is picked by the sample rate, and stores the result in a ProfileStore. The
+    response gets an X-Profile-Id header pointing at the stored profile.
+
+    cProfile sees the whole event loop thread, so other requests handled while
+    the profiled one awaits show up too, and only one request is profiled at a
+    time. Time spent suspended in await is not attributed to any function; it is
+    reported as await_seconds (wall time minus thread CPU time).
+    """
+
+    def __init__(self, app, store: ProfileStore, token: Optional[str] = None, sample_rate: float = 0.0):
+        self.app = app
+        self.store = store
+        self.token = token
+        self.sample_rate = sample_rate
+        self._active = False
+
+    def _requested(self, scope) -> bool:
+        if self.token:
+            for name, value in scope.get("headers", []):
+                if name == PROFILE_HEADER:
+                    return secrets.compare_digest(value.decode("latin-1"), self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._active or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        self._active = True
+        profiler = cProfile.Profile()
+        started_at = datetime.now(timezone.utc)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            self._active = False
+            profiler.create_stats()
+            self.store.add({
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": status_code,
+                "created_at": started_at,
+                "wall_seconds": round(wall, 6),
+                "cpu_seconds": round(cpu, 6),
+                "await_seconds": round(max(wall - cpu, 0.0), 6),
+                "stats": profiler.stats,
+            })
+
+
+profile_store = ProfileStore(max_entries=settings.profile_max_stored)
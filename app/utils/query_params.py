@@ -0,0 +1,23 @@
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+
+from app.utils.export_utils import parse_fields
+
+CURSOR_DESCRIPTION = (
+    "Opaque cursor from a previous next_cursor. Send an empty value to start cursor "
+    "pagination; the response is then a page object and skip is ignored"
+)
+
+
+def fields_description(allowed: List[str]) -> str:
+    """Description of a ?fields= query parameter that lists the selectable fields."""
+    return f"Comma separated fields to return (sparse fieldset): {', '.join(allowed)}"
+
+
+def selected_fields(fields: Optional[str], allowed: List[str]) -> Optional[List[str]]:
+    """parse_fields for a ?fields= query parameter; unknown fields are a 400."""
+    try:
+        return parse_fields(fields, allowed)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -0,0 +1,27 @@
+from typing import List
+
+
+def plan_stages(explain: dict) -> List[str]:
+    """
+    Every stage name in the winning plan of an explain() result, for both the
+    classic (queryPlanner.winningPlan) and SBE (winningPlan.queryPlan) layouts.
+    Aggregate explains nest the planner under stages[0].$cursor.
+    """
+    stages = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if "stage" in node:
+                stages.append(node["stage"])
+            for key in ("queryPlan", "inputStage", "inputStages", "innerStage", "outerStage"):
+                if key in node:
+                    walk(node[key])
+        elif isinstance(node, list):
+            for child in node:
+                walk(child)
+
+    if "queryPlanner" not in explain and explain.get("stages"):
+        explain = explain["stages"][0].get("$cursor", {})
+    planner = explain.get("queryPlanner", {})
+    walk(planner.get("winningPlan", {}))
+    return stages
@@ -0,0 +1,37 @@
+import re
+import unicodedata
+from typing import List, Optional
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Batas jumlah term per produk supaya deskripsi panjang tidak membengkakkan index
+MAX_TERMS_PER_PRODUCT = 256
+MAX_QUERY_TERMS = 8
+# Query term sepanjang ini atau lebih juga dicocokkan tanpa huruf terakhirnya
+TYPO_MIN_LENGTH = 4
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercased, accent-stripped word tokens, de-duplicated in order of appearance."""
+    if not text:
+        return []
+    normalized = unicodedata.normalize("NFKD", text)
+    normalized = "".join(ch for ch in normalized if not unicodedata.combining(ch)).lower()
+    return list(dict.fromkeys(_TOKEN_RE.findall(normalized)))
+
+
+def search_terms(name: Optional[str], description: Optional[str]) -> dict:
+    """
+    Fields stored on each product for search: name_terms for ranking and
+    search_terms (name + description) for matching through a multikey index.
+    """
+    name_terms = tokenize(name)[:MAX_TERMS_PER_PRODUCT]
+    all_terms = list(dict.fromkeys(name_terms + tokenize(description)))[:MAX_TERMS_PER_PRODUCT]
+    return {"name_terms": name_terms, "search_terms": all_terms}
+
+
+def query_prefixes(term: str) -> List[str]:
+    """Prefixes a query term may match: itself and, for longer terms, itself minus a trailing typo."""
+    if len(term) >= TYPO_MIN_LENGTH:
+        return [term, term[:-1]]
+    return [term]
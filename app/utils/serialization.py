@@ -0,0 +1,53 @@
+from typing import Iterable, List, Optional
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+def _orjson_default(value):
+    # ObjectId dan tipe BSON lain yang tidak dikenal orjson
+    return str(value)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    orjson response for routes that return plain dicts built by to_response.
+    Returning it directly skips FastAPI's response_model validation; the
+    response_model stays on the route for the OpenAPI schema.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def response_projection(fields: Optional[List[str]]) -> Optional[dict]:
+    """
+    Mongo projection for a sparse fieldset. _id and updated_at are always fetched
+    because the ETag is built from them; to_response leaves them out again when
+    they were not requested.
+    """
+    if not fields:
+        return None
+    projection = {field: 1 for field in fields if field != "id"}
+    projection["updated_at"] = 1
+    return projection
+
+
+def to_response(doc: dict, fields: Iterable[str]) -> dict:
+    """
+    Copy the response fields out of a raw Mongo document into a new dict, with
+    _id renamed to id. The document itself is never mutated, so cached documents
+    can be passed in.
+    """
+    content = {}
+    for field in fields:
+        if field == "id":
+            content["id"] = str(doc["_id"])
+        else:
+            content[field] = doc.get(field)
+    return content
+
+
+def to_response_list(docs: List[dict], fields: Iterable[str]) -> List[dict]:
+    fields = list(fields)
+    return [to_response(doc, fields) for doc in docs]
@@ -0,0 +1,140 @@
+import json
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from pymongo import monitoring
+
+from app.config import settings
+from app.utils.metrics import command_collection
+
+# Bagian perintah yang menentukan bentuk query (nilainya diganti nama tipe)
+_SHAPE_KEYS = ("filter", "query", "q", "sort", "pipeline", "key", "updates", "deletes")
+# Perintah yang bisa di-explain ulang dari dokumen perintahnya
+_EXPLAINABLE = ("find", "aggregate", "count", "distinct")
+_EXPLAIN_KEYS = {
+    "find": ("filter", "sort", "projection", "hint", "collation", "limit", "skip"),
+    "aggregate": ("pipeline", "hint", "collation"),
+    "count": ("query", "hint", "collation", "limit", "skip"),
+    "distinct": ("key", "query", "collation"),
+}
+
+
+def query_shape(value: Any) -> Any:
+    """
+    The structure of a filter/sort/pipeline with every literal replaced by its
+    type name, so queries that differ only in their values look the same.
+    """
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = []
+        for item in value:
+            shape = query_shape(item)
+            if shape not in shapes:
+                shapes.append(shape)
+        return shapes
+    return type(value).__name__
+
+
+class SlowQueryLog(monitoring.CommandListener):
+    """
+    Records commands slower than threshold_ms with their query shape. The
+    original command is kept privately so explain() can be run on demand; only
+    the shape is ever returned to callers.
+    """
+
+    def __init__(self, threshold_ms: float, max_entries: int = 500):
+        self.threshold_ms = threshold_ms
+        self._entries: deque = deque(maxlen=max_entries)
+        # (connection_id, request_id) -> (database, command); dict set/pop atomik di bawah GIL
+        self._commands: Dict[tuple, tuple] = {}
+
+    def started(self, event):
+        self._commands[(event.connection_id, event.request_id)] = (event.database_name, event.command)
+
+    def _finish(self, event, error: Optional[str] = None):
+        database_name, command = self._commands.pop((event.connection_id, event.request_id), (None, None))
+        duration_ms = event.duration_micros / 1000
+        if command is None or duration_ms < self.threshold_ms:
+            return
+        shape = {key: query_shape(command[key]) for key in _SHAPE_KEYS if key in command}
+        if "sort" in command:
+            # Arah sort bagian dari bentuk query, bukan nilai
+            shape["sort"] = dict(command["sort"])
+        self._entries.append({
+            "at": datetime.now(timezone.utc),
+            "database": database_name,
+            "command": event.command_name,
+            "collection": command_collection(event.command_name, command),
+            "duration_ms": round(duration_ms, 3),
+            "shape": shape,
+            "error": error,
+            "_command": command,
+        })
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event, error=str(event.failure.get("errmsg", "")) if isinstance(event.failure, dict) else "failed")
+
+    def clear(self):
+        self._entries.clear()
+
+    def entries(self, private: bool = False) -> List[dict]:
+        """Recorded commands, newest first; the raw command (_command) only when private is set."""
+        if private:
+            return list(reversed(self._entries))
+        return [
+            {key: value for key, value in entry.items() if key != "_command"}
+            for entry in reversed(self._entries)
+        ]
+
+    def summary(self) -> List[dict]:
+        """
+        Recorded commands grouped by command, collection and shape, slowest total
+        first. _entry holds the latest entry of each group (for explain).
+        """
+        groups: Dict[str, dict] = {}
+        for entry in list(self._entries):
+            key = json.dumps([entry["command"], entry["collection"], entry["shape"]], sort_keys=True)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {
+                    "command": entry["command"],
+                    "collection": entry["collection"],
+                    "shape": entry["shape"],
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "last_at": entry["at"],
+                    "_entry": entry,
+                }
+            group["count"] += 1
+            group["total_ms"] = round(group["total_ms"] + entry["duration_ms"], 3)
+            group["max_ms"] = max(group["max_ms"], entry["duration_ms"])
+            if entry["at"] >= group["last_at"]:
+                group["last_at"] = entry["at"]
+                group["_entry"] = entry
+        return sorted(groups.values(), key=lambda group: group["total_ms"], reverse=True)
+
+    @staticmethod
+    def explain_command(entry: dict) -> Optional[dict]:
+        """The command to pass to explain for a recorded entry, or None if it cannot be replayed."""
+        command = entry["_command"]
+        name = entry["command"]
+        if name not in _EXPLAINABLE or entry["collection"] is None:
+            return None
+        explained = {name: entry["collection"]}
+        explained.update({key: command[key] for key in _EXPLAIN_KEYS[name] if key in command})
+        if name == "aggregate":
+            explained["cursor"] = {}
+        return explained
+
+
+# None kalau dimatikan; listener hanya dipasang ke client kalau aktif
+slow_query_log = (
+    SlowQueryLog(settings.slow_query_ms, settings.slow_query_max_entries)
+    if settings.slow_query_ms is not None else None
+)
@@ -0,0 +1,114 @@
+"""
+Shared helpers for benchmark results: latency summaries and JSON baselines.
+
+Every suite (micro, load) saves its results as
+
+    {"suite": ..., "created_at": ..., "git_commit": ..., "python": ..., "params": {...},
+     "results": {case: {metric: value}}}
+
+under benchmarks/results/ (or --save PATH), and benchmarks.compare diffs two of them.
+Metric names say which way is better: *_ms and errors are lower-is-better,
+rps and ops are higher-is-better, anything else is informational.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+HIGHER_IS_BETTER = ("rps", "ops")
+LOWER_IS_BETTER_SUFFIXES = ("_ms", "errors")
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def latency_stats(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+    if not ordered:
+        return {"n": 0}
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(percentile(ordered, 0.50), 3),
+        "p99_ms": round(percentile(ordered, 0.99), 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(__file__)
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_baseline(suite: str, results: Dict[str, dict], params: dict, path: Optional[str] = None) -> str:
+    """Write a baseline file and return its path (default benchmarks/results/<suite>-<timestamp>.json)."""
+    now = datetime.now(timezone.utc)
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{suite}-{now:%Y%m%dT%H%M%S}.json")
+    baseline = {
+        "suite": suite,
+        "created_at": now.isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "params": params,
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+    return path
+
+
+def load_baseline(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def metric_direction(metric: str) -> int:
+    """1 if higher is better, -1 if lower is better, 0 if the metric is not compared."""
+    if metric in HIGHER_IS_BETTER:
+        return 1
+    if metric.endswith(LOWER_IS_BETTER_SUFFIXES):
+        return -1
+    return 0
+
+
+def compare_results(before: dict, after: dict, threshold: float = 0.10) -> List[dict]:
+    """
+    One row per case and compared metric present in both baselines. change is
+    the relative difference (after / before - 1); regression is set when the
+    metric got worse by more than threshold.
+    """
+    rows = []
+    for case, metrics in sorted(after["results"].items()):
+        previous = before["results"].get(case)
+        if previous is None:
+            continue
+        for metric, value in sorted(metrics.items()):
+            direction = metric_direction(metric)
+            old = previous.get(metric)
+            if direction == 0 or old is None:
+                continue
+            change = (value / old - 1) if old else (0.0 if value == old else float("inf"))
+            rows.append({
+                "case": case,
+                "metric": metric,
+                "before": old,
+                "after": value,
+                "change": change,
+                "regression": change * direction < -threshold,
+            })
+    return rows
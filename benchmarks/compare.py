@@ -0,0 +1,40 @@
+"""
+Before/after comparison of two benchmark baselines written by benchmarks.micro
+or benchmarks.load.
+
+    python -m benchmarks.compare benchmarks/results/load-before.json benchmarks/results/load-after.json
+
+Exits with status 1 when a metric got worse by more than --threshold (default 10%).
+"""
+import argparse
+import sys
+
+from benchmarks.baseline import compare_results, load_baseline
+
+
+def main(before_path: str, after_path: str, threshold: float, only_regressions: bool) -> int:
+    before = load_baseline(before_path)
+    after = load_baseline(after_path)
+    if before["suite"] != after["suite"]:
+        print(f"Comparing different suites: {before['suite']} vs {after['suite']}")
+    print(f"before: {before.get('git_commit')} {before['created_at']} {before['params']}")
+    print(f"after:  {after.get('git_commit')} {after['created_at']} {after['params']}")
+
+    rows = compare_results(before, after, threshold)
+    regressions = [row for row in rows if row["regression"]]
+    for row in (regressions if only_regressions else rows):
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"{row['case']:<40} {row['metric']:<8} {row['before']:>12.3f} -> {row['after']:>12.3f} "
+              f"{row['change']:>+8.1%} {flag}")
+    print(f"{len(rows)} metrics compared, {len(regressions)} regressions (threshold {threshold:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change that counts as a regression")
+    parser.add_argument("--only-regressions", action="store_true")
+    args = parser.parse_args()
+    sys.exit(main(args.before, args.after, args.threshold, args.only_regressions))
@@ -0,0 +1,108 @@
+"""
+Round-trips per crud write: the old insert/update/delete-then-read sequences
+against the single-command write paths in app/crud.
+
+    python -m benchmarks.crud_roundtrips --iterations 200
+
+Needs a running mongod at MONGODB_URL. Uses (and drops) the database named by
+BENCH_DATABASE_NAME, default "fastapi_crud_bench".
+"""
+import argparse
+import asyncio
+import os
+import time
+from collections import Counter
+
+from pymongo import monitoring
+
+os.environ["DATABASE_NAME"] = os.getenv("BENCH_DATABASE_NAME", "fastapi_crud_bench")
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.commands = Counter()
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if isinstance(collection, str):
+            self.commands[collection] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+counter = CommandCounter()
+# Listener harus terdaftar sebelum client Motor dibuat oleh app.database
+monitoring.register(counter)
+
+from app.database import get_client, get_database  # noqa: E402
+from app.crud import product as product_crud  # noqa: E402
+from app.crud.activity_log import activity_log_writer  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.schemas.product import ProductCreate, ProductUpdate  # noqa: E402
+
+products = product_crud.products_collection
+
+
+async def legacy_create(product: ProductCreate):
+    new_product = Product(**product.dict())
+    result = await products.insert_one(new_product.dict(by_alias=True))
+    return await products.find_one({"_id": result.inserted_id})
+
+
+async def legacy_update(product_id: str, product: ProductUpdate):
+    update_data = product.dict(exclude_unset=True)
+    await products.update_one({"_id": product_id}, {"$set": update_data})
+    return await products.find_one({"_id": product_id})
+
+
+async def legacy_delete(product_id: str):
+    await products.find_one({"_id": product_id})
+    await products.delete_one({"_id": product_id})
+
+
+async def current_create(product: ProductCreate):
+    return await product_crud.create_product(product)
+
+
+async def current_update(product_id: str, product: ProductUpdate):
+    return await product_crud.update_product(product_id, product)
+
+
+async def current_delete(product_id: str):
+    return await product_crud.delete_product(product_id)
+
+
+async def run(label, create, update, delete, iterations):
+    counter.commands.clear()
+    payload = ProductCreate(name="bench", description="bench", price=1, category="bench", stock=1, status="active")
+    started = time.perf_counter()
+    for i in range(iterations):
+        created = await create(payload)
+        product_id = str(created["_id"] if isinstance(created, dict) else created.id)
+        await update(product_id, ProductUpdate(stock=i))
+        await delete(product_id)
+    elapsed = time.perf_counter() - started
+    per_request = counter.commands["products"] / (iterations * 3)
+    print(f"{label:<8} products commands/request={per_request:.2f} "
+          f"mean latency/request={elapsed / (iterations * 3) * 1000:.2f}ms")
+
+
+async def main(iterations: int):
+    await activity_log_writer.start()
+    try:
+        await run("legacy", legacy_create, legacy_update, legacy_delete, iterations)
+        await run("current", current_create, current_update, current_delete, iterations)
+    finally:
+        await activity_log_writer.stop()
+        await get_client().drop_database(get_database().name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
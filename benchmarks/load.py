@@ -0,0 +1,270 @@
+"""
+HTTP load driver: runs each router's endpoints in turn against a running server
+and reports throughput and p50/p99 latency per scenario.
+
+    DATABASE_NAME=fastapi_crud_bench uvicorn main:app --workers 4 &
+    python -m benchmarks.load --url http://localhost:8000 --requests 2000 --concurrency 32
+    python -m benchmarks.load --writes --email adi.santoso0@example.com --save after.json
+
+Point the server at data from benchmarks.seed. Read scenarios only by default;
+--writes adds product create/update/delete, image upload and variant scenarios
+(everything written is deleted afterwards). --email (a seeded user, password
+SEED_PASSWORD) adds the auth scenarios. Results are saved as a baseline for
+benchmarks.compare.
+"""
+import argparse
+import asyncio
+import io
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.baseline import latency_stats, save_baseline
+
+SEED_PASSWORD = "benchmark123"  # sama dengan benchmarks.seed, tanpa meng-import app
+SEARCH_QUERIES = ["smart lamp", "bamboo", "wireless head", "leather wallet", "eco kettle", "vintage"]
+CATEGORIES = ["electronics", "fashion", "home", "kitchen", "sports"]
+
+Scenario = Callable[[httpx.AsyncClient, dict], Awaitable[httpx.Response]]
+SCENARIOS: Dict[str, Scenario] = {}
+WRITE_SCENARIOS = set()
+AUTH_SCENARIOS = set()
+
+
+def scenario(name: str, writes: bool = False, auth: bool = False):
+    def register(fn: Scenario):
+        SCENARIOS[name] = fn
+        if writes:
+            WRITE_SCENARIOS.add(name)
+        if auth:
+            AUTH_SCENARIOS.add(name)
+        return fn
+    return register
+
+
+@scenario("products.list")
+async def _(client, ctx):
+    return await client.get("/api/v1/products/", params={"limit": 20})
+
+
+@scenario("products.listing_filtered")
+async def _(client, ctx):
+    return await client.get("/api/v1/products/", params={
+        "category": random.choice(CATEGORIES), "sort": "price", "order": "asc", "in_stock": "true", "limit": 20,
+    })
+
+
+@scenario("products.listing_cursor")
+async def _(client, ctx):
+    return await client.get("/api/v1/products/", params={"sort": "created_at", "cursor": "", "limit": 50})
+
+
+@scenario("products.get")
+async def _(client, ctx):
+    return await client.get(f"/api/v1/products/{random.choice(ctx['product_ids'])}")
+
+
+@scenario("products.get_fields")
+async def _(client, ctx):
+    return await client.get(f"/api/v1/products/{random.choice(ctx['product_ids'])}", params={"fields": "name,price"})
+
+
+@scenario("products.search")
+async def _(client, ctx):
+    return await client.get("/api/v1/products/search", params={"q": random.choice(SEARCH_QUERIES), "limit": 20})
+
+
+@scenario("products.top")
+async def _(client, ctx):
+    return await client.get("/api/v1/products/top", params={"by": "price"})
+
+
+@scenario("users.list")
+async def _(client, ctx):
+    return await client.get("/api/v1/users/")
+
+
+@scenario("users.get")
+async def _(client, ctx):
+    return await client.get(f"/api/v1/users/{random.choice(ctx['user_ids'])}")
+
+
+@scenario("activity_logs.list")
+async def _(client, ctx):
+    return await client.get("/v1/activity-logs/", params={"limit": 50})
+
+
+@scenario("activity_logs.by_user")
+async def _(client, ctx):
+    return await client.get(f"/v1/activity-logs/user/{random.choice(ctx['user_ids'])}", params={"limit": 50})
+
+
+@scenario("activity_logs.top")
+async def _(client, ctx):
+    return await client.get("/v1/activity-logs/top-activities")
+
+
+@scenario("activity_logs.stats")
+async def _(client, ctx):
+    return await client.get("/v1/activity-logs/stats", params={"granularity": "hour"})
+
+
+@scenario("auth.login", auth=True)
+async def _(client, ctx):
+    return await client.post("/api/v1/auth/login", json={"email": ctx["email"], "password": SEED_PASSWORD})
+
+
+@scenario("auth.me", auth=True)
+async def _(client, ctx):
+    return await client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {ctx['token']}"})
+
+
+@scenario("products.create", writes=True)
+async def _(client, ctx):
+    response = await client.post("/api/v1/products/", json={
+        "name": "Load Test Lamp", "description": "created by benchmarks.load", "price": 10.5,
+        "category": "loadtest", "stock": 100, "status": "draft",
+    })
+    if response.status_code == 201:
+        ctx["created_products"].append(response.json()["id"])
+    return response
+
+
+@scenario("products.update", writes=True)
+async def _(client, ctx):
+    product_id = random.choice(ctx["created_products"])
+    return await client.put(f"/api/v1/products/{product_id}", json={"stock": random.randint(0, 100)})
+
+
+@scenario("products.delete", writes=True)
+async def _(client, ctx):
+    return await client.delete(f"/api/v1/products/{ctx['created_products'].pop()}")
+
+
+@scenario("upload.image", writes=True)
+async def _(client, ctx):
+    # Byte acak di belakang JPEG supaya tiap upload unik (tidak kena deduplikasi)
+    payload = ctx["image"] + random.randbytes(16)
+    response = await client.post("/api/v1/upload/image", files={"file": ("load.jpg", payload, "image/jpeg")})
+    if response.status_code == 200:
+        ctx["uploaded"].append(response.json()["image_url"])
+    return response
+
+
+@scenario("images.variant", writes=True)
+async def _(client, ctx):
+    image_url = random.choice(ctx["uploaded"][:20])
+    return await client.get(image_url, params={"w": random.choice([160, 320, 640]), "fmt": "webp"})
+
+
+def make_image() -> bytes:
+    from PIL import Image
+    image = Image.effect_mandelbrot((1280, 960), (-2.0, -1.2, 0.8, 1.2), 64).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+async def prepare(client: httpx.AsyncClient, email: Optional[str], writes: bool) -> dict:
+    products = (await client.get("/api/v1/products/", params={"limit": 200, "fields": "id"})).json()
+    users = (await client.get("/api/v1/users/", params={"fields": "id"})).json()
+    if not products or not users:
+        raise SystemExit("No products or users; seed the server's database with python -m benchmarks.seed")
+    ctx = {
+        "product_ids": [product["id"] for product in products],
+        "user_ids": [user["id"] for user in users],
+        "email": email,
+        "created_products": [],
+        "uploaded": [],
+    }
+    if email:
+        response = await client.post("/api/v1/auth/login", json={"email": email, "password": SEED_PASSWORD})
+        response.raise_for_status()
+        ctx["token"] = response.json()["token"]
+    if writes:
+        ctx["image"] = make_image()
+    return ctx
+
+
+async def cleanup(client: httpx.AsyncClient, ctx: dict):
+    for product_id in ctx["created_products"]:
+        await client.delete(f"/api/v1/products/{product_id}")
+    for image_url in ctx["uploaded"]:
+        await client.delete("/api/v1/upload/image", params={"image_url": image_url})
+
+
+async def run_scenario(client: httpx.AsyncClient, fn: Scenario, ctx: dict, requests: int, concurrency: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        await fn(client, ctx)
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                response = await fn(client, ctx)
+                failed = response.status_code >= 400
+            except (httpx.HTTPError, IndexError, KeyError):
+                failed = True
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    stats = latency_stats(latencies)
+    stats["rps"] = round(len(latencies) / elapsed, 1)
+    stats["errors"] = errors
+    return stats
+
+
+async def main(args):
+    selected = [
+        name for name in SCENARIOS
+        if (args.writes or name not in WRITE_SCENARIOS)
+        and (args.email or name not in AUTH_SCENARIOS)
+        and (not args.scenarios or any(name.startswith(prefix) for prefix in args.scenarios.split(",")))
+    ]
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=args.url, timeout=60, limits=limits) as client:
+        ctx = await prepare(client, args.email, args.writes)
+        print(f"{'scenario':<30} {'rps':>9} {'p50':>9} {'p99':>9} {'max':>9} {'errors':>7}")
+        try:
+            for name in selected:
+                # Login memakai bcrypt; jumlahnya dibatasi supaya suite tidak didominasi hashing
+                requests = min(args.requests, 200) if name == "auth.login" else args.requests
+                warmup = 0 if name in WRITE_SCENARIOS else args.warmup
+                stats = await run_scenario(client, SCENARIOS[name], ctx, requests, args.concurrency, warmup)
+                results[name] = stats
+                print(f"{name:<30} {stats['rps']:>9.1f} {stats['p50_ms']:>7.2f}ms {stats['p99_ms']:>7.2f}ms "
+                      f"{stats['max_ms']:>7.2f}ms {stats['errors']:>7}")
+        finally:
+            await cleanup(client, ctx)
+
+    params = {
+        "url": args.url, "requests": args.requests, "concurrency": args.concurrency,
+        "warmup": args.warmup, "writes": args.writes, "auth": bool(args.email),
+    }
+    print(f"Saved {save_baseline('load', results, params, args.save)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests before each read scenario")
+    parser.add_argument("--writes", action="store_true", help="include write scenarios")
+    parser.add_argument("--email", help="seeded user to log in as (enables auth scenarios)")
+    parser.add_argument("--scenarios", help="comma separated name prefixes, e.g. products.,users.get")
+    parser.add_argument("--save", help="baseline path (default benchmarks/results/load-<timestamp>.json)")
+    args = parser.parse_args()
+    asyncio.run(main(args))
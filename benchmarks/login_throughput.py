@@ -0,0 +1,65 @@
+"""
+Login password-check throughput and event-loop stall, hashing inline on the
+loop versus through the password hashing pool in app/utils/password_utils.
+
+    BCRYPT_ROUNDS=12 python -m benchmarks.login_throughput --logins 64 --concurrency 16
+
+No database needed: it benchmarks the verify step that dominates /api/v1/auth/login.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.utils.password_utils import pwd_context, verify_password, PASSWORD_HASH_WORKERS, BCRYPT_ROUNDS
+
+
+async def _ticker(lags: list, stop: asyncio.Event, interval: float = 0.005):
+    # Mengukur seberapa telat event loop menjalankan task lain selama hashing
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def _inline_verify(password: str, stored: str):
+    return pwd_context.verify_and_update(password, stored)
+
+
+async def run(label: str, verify, stored: str, logins: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    lags = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+
+    async def login():
+        async with semaphore:
+            valid, _ = await verify("benchmark-password", stored)
+            assert valid
+
+    started = time.perf_counter()
+    await asyncio.gather(*[login() for _ in range(logins)])
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(f"{label:<7} logins/s={logins / elapsed:8.1f}  "
+          f"loop lag p50={statistics.median(lags_ms):7.2f}ms p99={p99:7.2f}ms max={lags_ms[-1]:7.2f}ms")
+
+
+async def main(logins: int, concurrency: int):
+    stored = pwd_context.hash("benchmark-password")
+    print(f"bcrypt rounds={BCRYPT_ROUNDS} pool workers={PASSWORD_HASH_WORKERS}")
+    await run("inline", _inline_verify, stored, logins, concurrency)
+    await run("pool", verify_password, stored, logins, concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.concurrency))
@@ -0,0 +1,308 @@
+"""
+Micro-benchmarks of the Pydantic conversions in app/models and app/schemas, the
+response helpers in app/utils and (with --db) the read paths in app/crud.
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro --db --filter crud.
+    python -m benchmarks.micro --save before.json
+    python -m benchmarks.compare before.json benchmarks/results/micro-<timestamp>.json
+
+Each case is calibrated so that one round takes at least --min-time, then run for
+--rounds rounds; min/median/mean are per call, like pytest-benchmark reports them.
+--db needs a mongod at MONGODB_URL with data from benchmarks.seed in
+BENCH_DATABASE_NAME (default "fastapi_crud_bench").
+"""
+import argparse
+import asyncio
+import inspect
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+os.environ["DATABASE_NAME"] = os.getenv("BENCH_DATABASE_NAME", "fastapi_crud_bench")
+
+from bson import ObjectId  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.models.activity_log import ActivityLog  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.product import ProductCreate, ProductResponse  # noqa: E402
+from app.schemas.user import UserResponse  # noqa: E402
+from app.utils.cursor_utils import decode_cursor, encode_cursor  # noqa: E402
+from app.utils.etag_utils import collection_etag  # noqa: E402
+from app.utils.metrics import LATENCY_BUCKETS, Histogram  # noqa: E402
+from app.utils.search_utils import search_terms  # noqa: E402
+from app.utils.serialization import FastJSONResponse, to_response_list  # noqa: E402
+from app.utils.slow_queries import query_shape  # noqa: E402
+from benchmarks.baseline import save_baseline  # noqa: E402
+
+PRODUCT_FIELDS = list(ProductResponse.model_fields)
+# (name, setup, needs_db); setup mengembalikan fungsi (sync atau async) yang diukur
+BENCHMARKS = []
+
+
+def bench(name: str, db: bool = False):
+    def register(setup):
+        BENCHMARKS.append((name, setup, db))
+        return setup
+    return register
+
+
+def product_doc(i: int = 0) -> dict:
+    now = datetime.utcnow()
+    return {
+        "_id": str(ObjectId()),
+        "name": f"Smart Bamboo Lamp {i}",
+        "description": "Smart Bamboo Lamp, hand made, energy efficient, gift ready.",
+        "price": 49.5 + i,
+        "category": "home",
+        "stock": 10 + i,
+        "status": "active",
+        "image_url": None,
+        "created_at": now - timedelta(minutes=i),
+        "updated_at": now,
+    }
+
+
+def user_doc() -> dict:
+    now = datetime.utcnow()
+    return {
+        "_id": str(ObjectId()),
+        "email": "dewi.kusuma1@example.com",
+        "password": "$2b$12$" + "x" * 53,
+        "full_name": "Dewi Kusuma",
+        "role": "user",
+        "is_active": True,
+        "phone": "+628120000000",
+        "profile_picture": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+@bench("models.product_from_doc")
+def _():
+    doc = product_doc()
+    return lambda: Product(**doc)
+
+
+@bench("models.product_to_doc")
+def _():
+    product = Product(**product_doc())
+    return lambda: product.dict(by_alias=True)
+
+
+@bench("models.user_from_doc")
+def _():
+    doc = user_doc()
+    return lambda: User(**doc)
+
+
+@bench("models.activity_log_from_doc")
+def _():
+    doc = {
+        "_id": str(ObjectId()), "user_id": str(ObjectId()), "action": "update", "resource": "product",
+        "resource_id": str(ObjectId()), "details": {"stock": 3}, "created_at": datetime.utcnow(),
+    }
+    return lambda: ActivityLog(**doc)
+
+
+@bench("schemas.product_create")
+def _():
+    payload = {
+        "name": "Smart Bamboo Lamp", "description": "Hand made", "price": "1.250.000",
+        "category": "home", "stock": 5, "status": "active",
+    }
+    return lambda: ProductCreate(**payload)
+
+
+@bench("schemas.user_response_from_model")
+def _():
+    user = User(**user_doc())
+    return lambda: UserResponse(
+        id=str(user.id), email=user.email, full_name=user.full_name, role=user.role,
+        is_active=user.is_active, phone=user.phone, profile_picture=user.profile_picture,
+        created_at=user.created_at, updated_at=user.updated_at
+    )
+
+
+@bench("schemas.product_list_100_response_model")
+def _():
+    # Jalur lama: model -> ProductResponse -> validasi response_model -> JSON
+    docs = [product_doc(i) for i in range(100)]
+    adapter = TypeAdapter(List[ProductResponse])
+
+    def run():
+        items = [ProductResponse(id=str(doc["_id"]), **Product(**doc).dict(exclude={"id"})) for doc in docs]
+        return adapter.dump_json(adapter.validate_python(items))
+    return run
+
+
+@bench("serialization.product_list_100_orjson")
+def _():
+    docs = [product_doc(i) for i in range(100)]
+    response = FastJSONResponse(content=None)
+    return lambda: response.render(to_response_list(docs, PRODUCT_FIELDS))
+
+
+@bench("utils.search_terms")
+def _():
+    doc = product_doc()
+    return lambda: search_terms(doc["name"], doc["description"])
+
+
+@bench("utils.cursor_roundtrip")
+def _():
+    product_id = str(ObjectId())
+    return lambda: decode_cursor(encode_cursor("price:asc", 49.5, product_id), 3)
+
+
+@bench("utils.collection_etag_100")
+def _():
+    docs = [product_doc(i) for i in range(100)]
+    return lambda: collection_etag(docs)
+
+
+@bench("utils.query_shape")
+def _():
+    query = {"$and": [{"category": "home", "price": {"$gte": 10, "$lte": 100}}, {"stock": {"$gt": 0}}]}
+    return lambda: query_shape(query)
+
+
+@bench("utils.histogram_observe")
+def _():
+    histogram = Histogram(LATENCY_BUCKETS)
+    labels = ("GET", "/api/v1/products/{product_id}", "200")
+    return lambda: histogram.observe(labels, 0.0042)
+
+
+async def _sample(collection, field: str = "_id", size: int = 200) -> list:
+    docs = await collection.aggregate([{"$sample": {"size": size}}, {"$project": {field: 1}}]).to_list(length=size)
+    if not docs:
+        raise SystemExit(f"{collection.name} is empty; run python -m benchmarks.seed first")
+    return [doc[field] for doc in docs]
+
+
+@bench("crud.get_product_doc_cached", db=True)
+async def _():
+    from app.crud.product import get_product_doc, products_collection
+    product_id = (await _sample(products_collection, size=1))[0]
+    await get_product_doc(product_id)
+    return lambda: get_product_doc(product_id)
+
+
+@bench("crud.find_product_by_id", db=True)
+async def _():
+    from app.crud.product import PRODUCT_PROJECTION, products_collection
+    ids = await _sample(products_collection)
+    return lambda: products_collection.find_one({"_id": random.choice(ids)}, PRODUCT_PROJECTION)
+
+
+@bench("crud.product_listing_category_price", db=True)
+async def _():
+    from app.crud.product import get_product_listing
+    return lambda: get_product_listing(category="home", sort="price", order="asc", limit=20)
+
+
+@bench("crud.product_listing_in_stock_newest", db=True)
+async def _():
+    from app.crud.product import get_product_listing
+    return lambda: get_product_listing(in_stock=True, limit=20)
+
+
+@bench("crud.search_products", db=True)
+async def _():
+    from app.crud.product import search_products
+    queries = ["smart lamp", "bamboo", "wireless head", "leather wallet", "eco kettle"]
+    return lambda: search_products(random.choice(queries), limit=20)
+
+
+@bench("crud.get_user_by_email", db=True)
+async def _():
+    from app.crud.user import get_user_by_email, users_collection
+    emails = await _sample(users_collection, "email")
+    return lambda: get_user_by_email(random.choice(emails))
+
+
+@bench("crud.activity_logs_by_user", db=True)
+async def _():
+    from app.crud.activity_log import activity_logs_collection, get_activity_logs_by_user
+    user_ids = await _sample(activity_logs_collection, "user_id")
+    return lambda: get_activity_logs_by_user(random.choice(user_ids), limit=50, raw=True)
+
+
+@bench("crud.top_activities", db=True)
+async def _():
+    from app.crud.activity_log import get_top_activities
+    return lambda: get_top_activities()
+
+
+async def _time_round(fn: Callable, iterations: int, is_async: bool) -> float:
+    if is_async:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await fn()
+        return time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return time.perf_counter() - started
+
+
+async def run_case(fn: Callable, rounds: int, min_time: float) -> dict:
+    is_async = inspect.isawaitable(result := fn())
+    if is_async:
+        await result
+    # Kalibrasi: gandakan iterasi sampai satu round memakan minimal min_time
+    iterations = 1
+    while (elapsed := await _time_round(fn, iterations, is_async)) < min_time:
+        iterations *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    per_call = [await _time_round(fn, iterations, is_async) / iterations for _ in range(rounds)]
+    median = statistics.median(per_call)
+    return {
+        "iterations": iterations,
+        "rounds": rounds,
+        "min_ms": round(min(per_call) * 1000, 6),
+        "median_ms": round(median * 1000, 6),
+        "mean_ms": round(statistics.fmean(per_call) * 1000, 6),
+        "stddev": round(statistics.pstdev(per_call) * 1000, 6),
+        # Dari median, supaya satu round yang terganggu tidak menggeser ops/s
+        "ops": round(1 / median, 1),
+    }
+
+
+async def main(args):
+    cases = [
+        (name, setup) for name, setup, needs_db in BENCHMARKS
+        if (args.db or not needs_db) and (not args.filter or args.filter in name)
+    ]
+    results = {}
+    print(f"{'case':<42} {'min':>10} {'median':>10} {'mean':>10} {'ops/s':>12}")
+    for name, setup in cases:
+        fn = setup()
+        if inspect.isawaitable(fn):
+            fn = await fn
+        stats = await run_case(fn, args.rounds, args.min_time)
+        results[name] = stats
+        print(f"{name:<42} {stats['min_ms'] * 1000:>8.1f}us {stats['median_ms'] * 1000:>8.1f}us "
+              f"{stats['mean_ms'] * 1000:>8.1f}us {stats['ops']:>12,.0f}")
+    if args.db:
+        from app.database import close
+        close()
+    params = {"rounds": args.rounds, "min_time": args.min_time, "db": args.db, "filter": args.filter}
+    print(f"Saved {save_baseline('micro', results, params, args.save)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--min-time", type=float, default=0.02, help="minimum seconds per round")
+    parser.add_argument("--db", action="store_true", help="include crud cases (needs a seeded mongod)")
+    parser.add_argument("--filter", help="only run cases whose name contains this text")
+    parser.add_argument("--save", help="baseline path (default benchmarks/results/micro-<timestamp>.json)")
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,128 @@
+"""
+Checkout contention: hundreds of concurrent buyers place orders for one SKU
+through app.crud.order.place_order, then the run is checked for overselling.
+
+    python -m benchmarks.order_contention --stock 500 --buyers 800 --quantity 1
+    python -m benchmarks.order_contention --rounds 5 --save orders.json
+
+Every buyer tries once; exactly `stock // quantity` orders must succeed, the
+rest must get InsufficientStock, stock must drop by exactly what was sold and never
+go negative, and the orders collection must hold one order per success. The
+run exits 1 if any check fails. Needs a running mongod at MONGODB_URL. Uses
+(and drops) the database named by BENCH_DATABASE_NAME, default
+"fastapi_crud_bench".
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+os.environ["DATABASE_NAME"] = os.getenv("BENCH_DATABASE_NAME", "fastapi_crud_bench")
+
+from bson import ObjectId  # noqa: E402
+
+from app.database import get_client, get_database  # noqa: E402
+from app.crud.activity_log import activity_log_writer  # noqa: E402
+from app.crud.order import InsufficientStock, order_writer, orders_collection, place_order  # noqa: E402
+from app.crud.product import products_collection  # noqa: E402
+from app.schemas.order import OrderItemCreate  # noqa: E402
+from benchmarks.baseline import latency_stats, save_baseline  # noqa: E402
+
+
+async def create_sku(stock: int) -> str:
+    now = datetime.utcnow()
+    product_id = str(ObjectId())
+    await products_collection.insert_one({
+        "_id": product_id, "name": "Flash Sale Lamp", "description": "benchmarks.order_contention",
+        "price": 19.99, "category": "flashsale", "stock": stock, "status": "active",
+        "image_url": None, "created_at": now, "updated_at": now,
+    })
+    return product_id
+
+
+async def run_round(stock: int, buyers: int, quantity: int) -> dict:
+    product_id = await create_sku(stock)
+    items = [OrderItemCreate(product_id=product_id, quantity=quantity)]
+    user_ids = [str(ObjectId()) for _ in range(buyers)]
+    latencies: List[float] = []
+    outcomes = {"ok": 0, "sold_out": 0, "error": 0}
+    # Semua buyer dilepas bersamaan, supaya semuanya berebut dokumen yang sama
+    gate = asyncio.Event()
+
+    async def buyer(user_id: str):
+        await gate.wait()
+        started = time.perf_counter()
+        try:
+            await place_order(user_id, items)
+            outcomes["ok"] += 1
+        except InsufficientStock:
+            outcomes["sold_out"] += 1
+        except Exception as e:
+            outcomes["error"] += 1
+            print(f"  buyer failed: {e!r}")
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    tasks = [asyncio.create_task(buyer(user_id)) for user_id in user_ids]
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    gate.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    final = await products_collection.find_one({"_id": product_id}, {"stock": 1})
+    orders = await orders_collection.count_documents({"items.product_id": product_id})
+    expected = min(buyers, stock // quantity)
+    checks = {
+        "no_oversell": outcomes["ok"] * quantity <= stock,
+        "expected_successes": outcomes["ok"] == expected,
+        "final_stock": final["stock"] == stock - expected * quantity,
+        "stock_not_negative": final["stock"] >= 0,
+        "orders_stored": orders == outcomes["ok"],
+        "no_errors": outcomes["error"] == 0,
+    }
+    stats = latency_stats(latencies)
+    stats.update(outcomes)
+    stats["final_stock"] = final["stock"]
+    stats["orders"] = orders
+    # Disimpan sebagai "rps" supaya benchmarks.compare membandingkannya sebagai throughput
+    stats["rps"] = round(buyers / elapsed, 1)
+    stats["orders_per_s"] = round(outcomes["ok"] / elapsed, 1)
+    stats["passed"] = all(checks.values())
+    stats["failed_checks"] = [name for name, passed in checks.items() if not passed]
+    return stats
+
+
+async def main(args) -> bool:
+    await activity_log_writer.start()
+    await order_writer.start()
+    results = {}
+    try:
+        print(f"{'round':<8} {'ok':>6} {'sold out':>9} {'stock':>6} {'checkout/s':>11} {'p50':>9} {'p99':>9}  checks")
+        for i in range(args.rounds):
+            stats = await run_round(args.stock, args.buyers, args.quantity)
+            results[f"round_{i}"] = stats
+            verdict = "ok" if stats["passed"] else "FAILED " + ",".join(stats["failed_checks"])
+            print(f"{i:<8} {stats['ok']:>6} {stats['sold_out']:>9} {stats['final_stock']:>6} "
+                  f"{stats['rps']:>11.1f} {stats['p50_ms']:>7.2f}ms {stats['p99_ms']:>7.2f}ms  {verdict}")
+    finally:
+        await order_writer.stop()
+        await activity_log_writer.stop()
+        await get_client().drop_database(get_database().name)
+
+    params = {"stock": args.stock, "buyers": args.buyers, "quantity": args.quantity, "rounds": args.rounds}
+    print(f"Saved {save_baseline('order_contention', results, params, args.save)}")
+    return all(stats["passed"] for stats in results.values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--stock", type=int, default=500, help="initial stock of the SKU")
+    parser.add_argument("--buyers", type=int, default=800, help="concurrent buyers, one checkout each")
+    parser.add_argument("--quantity", type=int, default=1, help="units per order")
+    parser.add_argument("--rounds", type=int, default=3, help="fresh SKU per round")
+    parser.add_argument("--save", help="baseline path (default benchmarks/results/order_contention-<timestamp>.json)")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main(args)) else 1)
@@ -0,0 +1,249 @@
+"""
+Bulk-generate realistic users, products and activity logs for the benchmark suite.
+
+    python -m benchmarks.seed --users 100000 --products 200000 --logs 2000000 --drop
+
+Needs a running mongod at MONGODB_URL and writes to the database named by
+BENCH_DATABASE_NAME (default "fastapi_crud_bench"). Documents have the same shape
+as the crud functions write (string ids, search terms on products, bcrypt
+passwords), so the app can be pointed at the seeded database with
+DATABASE_NAME=fastapi_crud_bench. Every user's password is SEED_PASSWORD; the hash
+is computed once. The same --seed on the same day produces the same data.
+"""
+import argparse
+import asyncio
+import calendar
+import itertools
+import os
+import random
+import struct
+import time
+from datetime import datetime, timedelta
+from typing import Iterator, List
+
+from bson import ObjectId
+
+os.environ["DATABASE_NAME"] = os.getenv("BENCH_DATABASE_NAME", "fastapi_crud_bench")
+
+from app.database import get_client, get_database, close  # noqa: E402
+from app.crud.user import users_collection  # noqa: E402
+from app.crud.product import products_collection  # noqa: E402
+from app.crud.activity_log import activity_logs_collection, rebuild_activity_counters  # noqa: E402
+from app.crud.activity_rollup import rebuild_activity_rollups  # noqa: E402
+import app.crud.upload  # noqa: E402,F401  (mendaftarkan index uploads)
+import app.crud.order  # noqa: E402,F401  (mendaftarkan index orders)
+from app.utils.index_registry import index_registry  # noqa: E402
+from app.utils.password_utils import pwd_context  # noqa: E402
+from app.utils.search_utils import search_terms  # noqa: E402
+
+SEED_PASSWORD = "benchmark123"
+
+FIRST_NAMES = [
+    "Adi", "Budi", "Citra", "Dewi", "Eko", "Fajar", "Gita", "Hadi", "Indah", "Joko",
+    "Kartika", "Lestari", "Maya", "Nanda", "Oki", "Putri", "Rina", "Sari", "Tono", "Wulan",
+    "Alice", "Bob", "Carol", "Dave", "Erin", "Frank", "Grace", "Heidi", "Ivan", "Judy",
+]
+LAST_NAMES = [
+    "Santoso", "Wijaya", "Saputra", "Pratama", "Hidayat", "Kusuma", "Nugroho", "Siregar",
+    "Halim", "Gunawan", "Smith", "Johnson", "Brown", "Garcia", "Miller", "Davis",
+]
+ADJECTIVES = [
+    "Classic", "Compact", "Deluxe", "Eco", "Ergonomic", "Premium", "Portable", "Rustic",
+    "Sleek", "Smart", "Vintage", "Wireless", "Heavy-Duty", "Lightweight", "Organic", "Pro",
+]
+MATERIALS = [
+    "Bamboo", "Cotton", "Leather", "Steel", "Wooden", "Ceramic", "Glass", "Plastic",
+    "Aluminium", "Rattan", "Batik", "Silk", "Granite", "Carbon", "Wool", "Rubber",
+]
+NOUNS = [
+    "Chair", "Lamp", "Backpack", "Keyboard", "Mug", "Headphones", "Sneakers", "Jacket",
+    "Speaker", "Watch", "Kettle", "Notebook", "Wallet", "Blender", "Monitor", "Tumbler",
+    "Helmet", "Umbrella", "Pillow", "Charger",
+]
+FEATURES = [
+    "water resistant", "hand made", "two year warranty", "fast charging", "easy to clean",
+    "locally sourced", "energy efficient", "gift ready", "limited edition", "ultra quiet",
+]
+CATEGORIES = [
+    "electronics", "fashion", "home", "kitchen", "sports", "books", "beauty", "toys",
+    "automotive", "garden", "office", "health", "music", "pets", "grocery", "crafts",
+    "baby", "tools", "travel", "outdoor",
+]
+# (action, resource, bobot): kebanyakan log adalah view produk
+LOG_KINDS = [
+    ("view", "product", 60), ("update", "product", 12), ("create", "product", 6),
+    ("delete", "product", 2), ("view", "user", 10), ("update", "user", 6),
+    ("create", "user", 3), ("login", "user", 1),
+]
+
+
+def zipf_cum_weights(count: int, exponent: float = 1.1) -> List[float]:
+    """Cumulative weights where item k is picked in proportion to 1/(k+1)^exponent."""
+    return list(itertools.accumulate(1 / (k + 1) ** exponent for k in range(count)))
+
+
+def make_id(rng: random.Random, created_at: datetime) -> str:
+    # Timestamp ObjectId mengikuti created_at, sisanya dari rng supaya hasil seed bisa diulang
+    return str(ObjectId(struct.pack(">I", calendar.timegm(created_at.utctimetuple())) + rng.randbytes(8)))
+
+
+def random_time(rng: random.Random, now: datetime, days: int) -> datetime:
+    return (now - timedelta(seconds=rng.uniform(0, days * 86400))).replace(microsecond=0)
+
+
+def generate_users(rng: random.Random, count: int, now: datetime, days: int, password_hash: str) -> Iterator[dict]:
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        created_at = random_time(rng, now, days)
+        yield {
+            "_id": make_id(rng, created_at),
+            "email": f"{first.lower()}.{last.lower()}{i}@example.com",
+            "password": password_hash,
+            "full_name": f"{first} {last}",
+            "role": "admin" if rng.random() < 0.02 else "user",
+            "is_active": rng.random() < 0.95,
+            "phone": f"+62812{rng.randrange(10 ** 7):07d}" if rng.random() < 0.6 else None,
+            "profile_picture": None,
+            "created_at": created_at,
+            "updated_at": created_at + timedelta(seconds=rng.uniform(0, (now - created_at).total_seconds())),
+        }
+
+
+def generate_products(rng: random.Random, count: int, now: datetime, days: int) -> Iterator[dict]:
+    category_weights = zipf_cum_weights(len(CATEGORIES))
+    for _ in range(count):
+        name = f"{rng.choice(ADJECTIVES)} {rng.choice(MATERIALS)} {rng.choice(NOUNS)}"
+        description = f"{name}, {', '.join(rng.sample(FEATURES, 3))}."
+        created_at = random_time(rng, now, days)
+        doc = {
+            "_id": make_id(rng, created_at),
+            "name": name,
+            "description": description,
+            "price": round(min(rng.lognormvariate(3.5, 1.2), 20000), 2),
+            "category": rng.choices(CATEGORIES, cum_weights=category_weights)[0],
+            "stock": 0 if rng.random() < 0.1 else rng.randint(1, 500),
+            "status": rng.choices(["active", "inactive", "draft"], weights=[85, 10, 5])[0],
+            "image_url": None,
+            "created_at": created_at,
+            "updated_at": created_at + timedelta(seconds=rng.uniform(0, (now - created_at).total_seconds())),
+        }
+        doc.update(search_terms(name, description))
+        yield doc
+
+
+def generate_logs(
+    rng: random.Random,
+    count: int,
+    now: datetime,
+    days: int,
+    user_ids: List[str],
+    product_ids: List[str]
+) -> Iterator[dict]:
+    # Sebagian kecil user dan produk menghasilkan sebagian besar aktivitas
+    user_weights = zipf_cum_weights(len(user_ids))
+    product_weights = zipf_cum_weights(len(product_ids))
+    kinds = [(action, resource) for action, resource, _ in LOG_KINDS]
+    kind_weights = [weight for _, _, weight in LOG_KINDS]
+    for _ in range(count):
+        action, resource = rng.choices(kinds, weights=kind_weights)[0]
+        user_id = rng.choices(user_ids, cum_weights=user_weights)[0] if user_ids else None
+        if resource == "product" and product_ids:
+            resource_id = rng.choices(product_ids, cum_weights=product_weights)[0]
+        else:
+            resource_id = user_id
+        created_at = random_time(rng, now, days)
+        yield {
+            "_id": make_id(rng, created_at),
+            "user_id": user_id,
+            "action": action,
+            "resource": resource,
+            "resource_id": resource_id,
+            "details": {"source": "seed"} if action != "view" else None,
+            "created_at": created_at,
+        }
+
+
+async def insert_all(collection, docs: Iterator[dict], total: int, batch_size: int, concurrency: int, ids: list = None):
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = set()
+    inserted = 0
+    started = time.perf_counter()
+
+    async def insert(batch):
+        nonlocal inserted
+        try:
+            await collection.insert_many(batch, ordered=False)
+        finally:
+            semaphore.release()
+        inserted += len(batch)
+        if inserted % (batch_size * 20) < batch_size or inserted == total:
+            rate = inserted / (time.perf_counter() - started)
+            print(f"  {collection.name}: {inserted}/{total} ({rate:,.0f} docs/s)")
+
+    while True:
+        batch = list(itertools.islice(docs, batch_size))
+        if not batch:
+            break
+        if ids is not None:
+            ids.extend(doc["_id"] for doc in batch)
+        await semaphore.acquire()
+        task = asyncio.create_task(insert(batch))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - started
+
+
+async def main(args):
+    rng = random.Random(args.seed)
+    # Waktu acuan dibulatkan ke hari, supaya seed yang sama menghasilkan data yang sama
+    now = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    database = get_database()
+    if args.drop:
+        await get_client().drop_database(database.name)
+        print(f"Dropped {database.name}")
+
+    # Index dibuat setelah data masuk, lebih cepat daripada memelihara index saat bulk insert
+    password_hash = pwd_context.hash(SEED_PASSWORD)
+    user_ids: List[str] = []
+    product_ids: List[str] = []
+    elapsed = await insert_all(
+        users_collection, generate_users(rng, args.users, now, args.days, password_hash),
+        args.users, args.batch_size, args.concurrency, user_ids
+    )
+    print(f"Inserted {args.users} users in {elapsed:.1f}s")
+    elapsed = await insert_all(
+        products_collection, generate_products(rng, args.products, now, args.days),
+        args.products, args.batch_size, args.concurrency, product_ids
+    )
+    print(f"Inserted {args.products} products in {elapsed:.1f}s")
+    elapsed = await insert_all(
+        activity_logs_collection, generate_logs(rng, args.logs, now, args.days, user_ids, product_ids),
+        args.logs, args.batch_size, args.concurrency
+    )
+    print(f"Inserted {args.logs} activity logs in {elapsed:.1f}s")
+
+    started = time.perf_counter()
+    await index_registry.reconcile()
+    print(f"Created indexes in {time.perf_counter() - started:.1f}s")
+    if not args.skip_aggregates:
+        started = time.perf_counter()
+        await rebuild_activity_counters()
+        await rebuild_activity_rollups()
+        print(f"Rebuilt activity counters and rollups in {time.perf_counter() - started:.1f}s")
+    close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--products", type=int, default=200_000)
+    parser.add_argument("--logs", type=int, default=2_000_000)
+    parser.add_argument("--days", type=int, default=365, help="spread created_at over this many days")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=4, help="insert_many calls in flight")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--drop", action="store_true", help="drop the benchmark database first")
+    parser.add_argument("--skip-aggregates", action="store_true", help="do not rebuild activity counters/rollups")
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,104 @@
+"""
+List endpoint throughput with the old read path (Product(**doc) -> ProductResponse
+-> response_model validation -> json) versus raw documents rendered with orjson
+through app/utils/serialization.
+
+    python -m benchmarks.serialization --items 100 --requests 2000
+
+No database needed: both routes serve the same in-memory documents through a
+small FastAPI app driven in-process by httpx, so only the serialization differs.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+import httpx
+from bson import ObjectId
+from fastapi import FastAPI
+
+from app.models.product import Product
+from app.schemas.product import ProductResponse
+from app.utils.serialization import FastJSONResponse, to_response_list
+
+PRODUCT_FIELDS = list(ProductResponse.model_fields)
+
+
+def make_docs(count: int) -> List[dict]:
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": str(ObjectId()),
+            "name": f"Product {i}",
+            "description": "Benchmark product " * 8,
+            "price": 10.5 + i,
+            "category": f"category-{i % 10}",
+            "stock": i,
+            "status": "active",
+            "image_url": f"/uploads/{i}.jpg",
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now,
+        }
+        for i in range(count)
+    ]
+
+
+def build_app(docs: List[dict]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/before", response_model=List[ProductResponse])
+    async def before():
+        products = [Product(**doc) for doc in docs]
+        return [
+            ProductResponse(
+                id=str(product.id),
+                name=product.name,
+                description=product.description,
+                price=product.price,
+                category=product.category,
+                stock=product.stock,
+                status=product.status,
+                image_url=product.image_url,
+                created_at=product.created_at,
+                updated_at=product.updated_at
+            )
+            for product in products
+        ]
+
+    @app.get("/after", response_model=List[ProductResponse])
+    async def after():
+        return FastJSONResponse(to_response_list(docs, PRODUCT_FIELDS))
+
+    return app
+
+
+async def run(client: httpx.AsyncClient, path: str, requests: int) -> float:
+    # Pemanasan supaya schema/validator sudah dibangun sebelum diukur
+    for _ in range(20):
+        (await client.get(path)).raise_for_status()
+    started = time.perf_counter()
+    for _ in range(requests):
+        await client.get(path)
+    return requests / (time.perf_counter() - started)
+
+
+async def main(items: int, requests: int):
+    app = build_app(make_docs(items))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        before, after = (await client.get("/before")).json(), (await client.get("/after")).json()
+        assert before == after, "both paths must return the same payload"
+        print(f"items per response={items}")
+        before_rps = await run(client, "/before", requests)
+        after_rps = await run(client, "/after", requests)
+    print(f"before req/s={before_rps:8.1f}")
+    print(f"after  req/s={after_rps:8.1f}  ({after_rps / before_rps:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.items, args.requests))
@@ -0,0 +1,115 @@
+"""
+Latency of a cheap endpoint while large image uploads are in flight, to check
+that uploads do not stall the event loop of the worker serving them.
+
+    uvicorn main:app --workers 1 &
+    python -m benchmarks.upload_concurrency --url http://localhost:8000 --uploads 20
+
+Before measuring, it checks that an oversized upload gets 413, both with a
+Content-Length and chunked (no Content-Length), and exits 1 otherwise.
+Requires httpx (benchmarks/requirements.txt). Uploaded files are deleted afterwards.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+PROBE_PATH = "/openapi.json"
+UPLOAD_PATH = "/api/v1/upload/image"
+MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # sama dengan app.routes.upload.MAX_FILE_SIZE
+
+
+async def probe(client: httpx.AsyncClient, latencies: list, stop: asyncio.Event):
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get(PROBE_PATH)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def check_size_limit(client: httpx.AsyncClient) -> bool:
+    boundary = "bench-boundary"
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="big.jpg"\r\n'
+        f"Content-Type: image/jpeg\r\n\r\n"
+    ).encode() + os.urandom(MAX_UPLOAD_SIZE + 256 * 1024) + f"\r\n--{boundary}--\r\n".encode()
+    headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+    async def chunks():
+        # Body dari generator dikirim chunked, tanpa Content-Length
+        for i in range(0, len(body), 64 * 1024):
+            yield body[i:i + 64 * 1024]
+
+    passed = True
+    for label, content in (("content-length", body), ("chunked", chunks())):
+        response = await client.post(UPLOAD_PATH, content=content, headers=headers)
+        ok = response.status_code == 413
+        passed = passed and ok
+        print(f"oversized upload ({label}): {response.status_code} {'ok' if ok else 'FAILED, expected 413'}")
+    return passed
+
+
+def summary(label: str, latencies: list):
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{label:<16} n={len(ordered):5d} p50={statistics.median(ordered):7.2f}ms "
+          f"p99={p99:7.2f}ms max={ordered[-1]:7.2f}ms")
+
+
+async def main(url: str, uploads: int, concurrency: int, size: int, idle_seconds: float):
+    payload = os.urandom(size)
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        if not await check_size_limit(client):
+            return False
+
+        idle = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, idle, stop))
+        await asyncio.sleep(idle_seconds)
+        stop.set()
+        await task
+        summary("idle", idle)
+
+        loaded = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, loaded, stop))
+        semaphore = asyncio.Semaphore(concurrency)
+        image_urls = []
+
+        async def upload(i: int):
+            async with semaphore:
+                response = await client.post(
+                    UPLOAD_PATH,
+                    files={"file": (f"bench-{i}.jpg", payload, "image/jpeg")},
+                )
+                response.raise_for_status()
+                image_urls.append(response.json()["image_url"])
+
+        started = time.perf_counter()
+        await asyncio.gather(*[upload(i) for i in range(uploads)])
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await task
+        summary("during uploads", loaded)
+        print(f"uploads: {uploads} x {size / 1024 / 1024:.1f}MB in {elapsed:.2f}s "
+              f"({uploads * size / 1024 / 1024 / elapsed:.1f}MB/s)")
+
+        for image_url in image_urls:
+            await client.delete(UPLOAD_PATH, params={"image_url": image_url})
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--uploads", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--size", type=int, default=4 * 1024 * 1024, help="bytes per upload")
+    parser.add_argument("--idle-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main(args.url, args.uploads, args.concurrency, args.size, args.idle_seconds)) else 1)
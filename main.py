@@ -1,15 +1,56 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
-from app.routes import users, products, activity_logs,auth,upload
-from app.database import get_database
-from app.crud.product import create_category_index
+from app.routes import users, products, activity_logs,auth,upload,images,debug,orders
+from app.database import get_database, connect, close
+from app.config import settings
+from app.utils.pool_metrics import pool_metrics
+from app.utils.metrics import MetricsMiddleware, render_metrics
+from app.utils.profiler import ProfilerMiddleware, profile_store
+from app.crud.activity_log import activity_log_writer
+from app.crud.order import order_writer
+from app.crud.activity_rollup import run_rollup_compaction
+from app.crud.activity_archive import run_activity_log_archiver
+from app.utils.cache import cache
+from app.utils.body_limit import BodySizeLimitMiddleware
+from app.utils.image_variants import variant_cache
+from app.utils.index_registry import index_registry
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Client Mongo dibuat di sini, di dalam proses worker, bukan saat modul di-import
+    connect()
+    await cache.start()
+    if settings.reconcile_indexes_on_startup:
+        # Index dideklarasikan di modul crud masing-masing (sudah ter-import lewat routers)
+        await index_registry.reconcile()
+    await activity_log_writer.start()
+    await order_writer.start()
+    app.state.rollup_compaction = asyncio.create_task(run_rollup_compaction())
+    # Selalu jalan: selain mengarsip, archiver juga yang membuat/menghapus index TTL
+    app.state.log_archiver = asyncio.create_task(run_activity_log_archiver())
+    try:
+        yield
+    finally:
+        app.state.rollup_compaction.cancel()
+        app.state.log_archiver.cancel()
+        variant_cache.shutdown()
+        # Flush order dan log yang masih antre sebelum client ditutup; order dulu,
+        # karena flush order ikut mengantrekan activity log-nya
+        await order_writer.stop()
+        await activity_log_writer.stop()
+        await cache.stop()
+        close()
+
 app = FastAPI(
     title="FastAPI V1",
     description="Crud Auth, Users, Products",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 # app.add_middleware(
 #     CORSMiddleware,
@@ -19,6 +60,13 @@ app = FastAPI(
 #     allow_headers=["*"],
 # )
 
+# Tolak upload yang kebesaran selagi body masih diterima (sisa 64KB untuk overhead multipart)
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_body_size=upload.MAX_FILE_SIZE + 64 * 1024,
+    path_prefix=upload.router.prefix
+)
+# CORS ditambahkan setelahnya supaya respons 413 tetap membawa header CORS
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -35,19 +83,26 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Profiler di dalam MetricsMiddleware, supaya overhead profiling ikut terlihat di latency
+app.add_middleware(
+    ProfilerMiddleware,
+    store=profile_store,
+    token=settings.debug_token,
+    sample_rate=settings.profile_sample_rate
+)
+# Paling luar, supaya semua respons (termasuk 413 dan preflight CORS) ikut terukur
+app.add_middleware(MetricsMiddleware)
 # Include routers
+# Router images harus sebelum mount /uploads supaya ?w=&fmt= ditangani di sana
+app.include_router(images.router)
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 app.include_router(users.router)
 app.include_router(products.router)
-# app.include_router(orders.router)
+app.include_router(orders.router)
 app.include_router(activity_logs.router)
 app.include_router(auth.router)
 app.include_router(upload.router)
-
-@app.on_event("startup")
-async def startup_event():
-    # Create indexes on startup
-    await create_category_index()
+app.include_router(debug.router)
 
 # @app.get("/")
 # async def root():
@@ -59,9 +114,34 @@ async def health_check():
         db = get_database()
         # Test database connection
         await db.command("ping")
-        return {"status": "healthy", "database": "connected"}
+        return {
+            "status": "healthy",
+            "database": "connected",
+            "cache": cache.stats(),
+            "pool": pool_metrics.stats()
+        }
     except Exception as e:
         return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
 
+@app.get("/v1/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    extra = {}
+    for name, value in cache.stats().items():
+        kind = "gauge" if name == "entries" else "counter"
+        extra[f"app_cache_{name}" + ("_total" if kind == "counter" else "")] = (kind, f"Read-through cache {name}", value)
+    for name, value in activity_log_writer.stats().items():
+        kind = "gauge" if name == "pending" else "counter"
+        extra[f"activity_log_writer_{name}" + ("_total" if kind == "counter" else "")] = (kind, f"Activity log writer {name}", value)
+    for name, value in order_writer.stats().items():
+        kind = "gauge" if name == "pending" else "counter"
+        extra[f"order_writer_{name}" + ("_total" if kind == "counter" else "")] = (kind, f"Order writer {name}", value)
+    for name, value in pool_metrics.stats().items():
+        if name == "checkout_wait_seconds":
+            continue  # sudah ada sebagai histogram mongodb_pool_checkout_wait_seconds
+        name = name.replace("pool_", "")
+        kind = "gauge" if name in ("open", "in_use") else "counter"
+        extra[f"mongodb_pool_{name}" + ("_total" if kind == "counter" else "")] = (kind, f"MongoDB connection pool {name}", value)
+    return PlainTextResponse(render_metrics(extra), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""
+Maintenance commands, run from the project root:
+
+    python manage.py rebuild-counters
+    python manage.py rebuild-rollups
+    python manage.py compact-rollups
+    python manage.py archive-activity-logs
+    python manage.py rebuild-search-terms
+    python manage.py sync-indexes
+    python manage.py check-plans
+"""
+import argparse
+import asyncio
+import sys
+
+from app.crud.activity_log import rebuild_activity_counters
+from app.crud.activity_rollup import rebuild_activity_rollups, compact_activity_rollups
+from app.crud.activity_archive import archive_activity_logs as archive_logs, check_archive_lag, sync_ttl_index
+from app.crud.product import rebuild_search_terms as rebuild_product_search_terms
+# Modul crud mendeklarasikan index dan query-nya saat di-import
+import app.crud.user  # noqa: F401
+import app.crud.upload  # noqa: F401
+import app.crud.order  # noqa: F401
+from app.utils.index_registry import index_registry
+from app.utils.query_plans import plan_stages
+
+
+async def rebuild_counters(args):
+    count = await rebuild_activity_counters()
+    print(f"Rebuilt {count} activity counters")
+
+
+async def rebuild_rollups(args):
+    await rebuild_activity_rollups()
+    print("Rebuilt activity rollups")
+
+
+async def compact_rollups(args):
+    await compact_activity_rollups()
+    print("Compacted activity rollups")
+
+
+async def archive_activity_logs(args):
+    count = await archive_logs()
+    print(f"Archived {count} activity logs")
+    print(f"TTL index: {'in place' if await sync_ttl_index() else 'not created'}")
+    if not await check_archive_lag():
+        sys.exit(1)
+
+
+async def rebuild_search_terms(args):
+    count = await rebuild_product_search_terms()
+    print(f"Rebuilt search terms for {count} products")
+
+
+async def sync_indexes(args):
+    reports = await index_registry.reconcile()
+    for name, report in reports.items():
+        details = ", ".join(f"{key}={values}" for key, values in report.items() if values)
+        print(f"{name}: {details or 'in sync'}")
+    if any(report["drift"] or report["failed"] for report in reports.values()):
+        sys.exit(1)
+
+
+async def check_plans(args):
+    """
+    Explain every query declared with index_registry.register_query and fail when
+    one does a COLLSCAN; an in-memory SORT is reported but allowed. Run it against
+    a local mongod with realistic data, since the planner picks plans from it.
+    Declared indexes are created first.
+    """
+    await index_registry.reconcile()
+    failures = 0
+    for query in index_registry.queries:
+        cursor = query["collection"].find(query["filter"])
+        if query["sort"]:
+            cursor = cursor.sort(query["sort"])
+        stages = plan_stages(await cursor.limit(100).explain())
+        if "COLLSCAN" in stages:
+            failures += 1
+            label = "FAIL"
+        else:
+            label = "sort" if "SORT" in stages else "ok"
+        print(f"{label:<4} {' > '.join(stages):<40} {query['name']}")
+    if failures:
+        print(f"{failures} queries do a COLLSCAN")
+        sys.exit(1)
+
+
+COMMANDS = {
+    "rebuild-counters": (rebuild_counters, "Recompute activity_counters from activity_logs"),
+    "rebuild-rollups": (rebuild_rollups, "Recompute activity_rollups from activity_logs"),
+    "compact-rollups": (compact_rollups, "Roll minute buckets into hours and hours into days"),
+    "archive-activity-logs": (archive_activity_logs, "Copy old activity logs into the monthly archives and sync the TTL index"),
+    "rebuild-search-terms": (rebuild_search_terms, "Recompute product search fields from name/description"),
+    "sync-indexes": (sync_indexes, "Create missing declared indexes and report drift"),
+    "check-plans": (check_plans, "Fail if a declared crud query does a COLLSCAN"),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="backend-st maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        subparsers.add_parser(name, help=help_text)
+    args = parser.parse_args()
+    asyncio.run(COMMANDS[args.command][0](args))
+
+
+if __name__ == "__main__":
+    main()